@@ -0,0 +1,158 @@
+"""
+Document Archival for M&J Toys Inc.
+Moves documents older than a configurable age out of the documents table
+into gzip-compressed JSON-lines files partitioned by day
+(archive/documents/dt=YYYY-MM-DD/part-<run>.jsonl.gz). Each archived
+document leaves a small stub in the table (summary fields plus archive_key),
+so history, search and /get-document keep working; reads of archived
+documents fall through to the archive with an in-container cache.
+
+Usage:
+    python archive.py --older-than-days 365
+"""
+
+import gzip
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+
+ARCHIVE_PREFIX = 'archive/documents'
+ARCHIVE_AGE_DAYS = int(os.environ.get('MJTOYS_ARCHIVE_AGE_DAYS', '365'))
+
+# Order header fields kept on the stub for history listings
+STUB_ORDER_FIELDS = ('Order_number', 'Customer_ID', 'PO_No', 'Recipient_Company', 'Invoice_Date')
+
+# Documents buffered before archive files are written
+FLUSH_DOCUMENTS = 1000
+
+# Archived documents kept in memory after a read-through
+CACHE_SIZE = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _json_default(obj):
+    # DynamoDB numbers come back as Decimal
+    return int(obj) if obj == obj.to_integral_value() else float(obj)
+
+def partition_key(created_at, part):
+    day = str(created_at)[:10] or 'unknown'
+    return f'{ARCHIVE_PREFIX}/dt={day}/part-{part}.jsonl.gz'
+
+def make_stub(document, archive_key):
+    """Table item left behind for an archived document"""
+    order = document.get('order_data') or {}
+    stub = {k: v for k, v in document.items() if k != 'order_data' and k != 'html_content'}
+    stub['order_data'] = {field: order[field] for field in STUB_ORDER_FIELDS if field in order}
+    stub['archive_key'] = archive_key
+    stub['archived_at'] = datetime.utcnow().isoformat()
+    return stub
+
+def _flush(storage, partitions):
+    """Write one archive file per day, then swap the documents for stubs"""
+    archived = 0
+    for key, documents in sorted(partitions.items()):
+        lines = ''.join(json.dumps(doc, default=_json_default) + '\n' for doc in documents)
+        # Archive file first: a failure part way leaves documents in both tiers, never neither
+        storage.blobs.put(key, gzip.compress(lines.encode('utf-8')), content_type='application/gzip')
+        for document in documents:
+            storage.documents.put(make_stub(document, key))
+        archived += len(documents)
+        print(f"Archived {len(documents)} documents to {storage.blobs.uri(key)}")
+    return archived
+
+def archive_documents(storage, older_than_days=ARCHIVE_AGE_DAYS, dry_run=False):
+    """Archive documents created more than older_than_days ago. Returns counts."""
+    cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).isoformat()
+    run_id = f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    archived = 0
+    files = 0
+    flushes = 0
+    partitions = defaultdict(list)
+    buffered = 0
+    for items, _ in storage.documents.scan_segment(0, 1):
+        for document in items:
+            if document.get('archive_key') or str(document.get('created_at', '')) >= cutoff:
+                continue
+            partitions[partition_key(document.get('created_at', ''), f'{run_id}-{flushes}')].append(document)
+            buffered += 1
+        if buffered >= FLUSH_DOCUMENTS:
+            files += len(partitions)
+            archived += buffered if dry_run else _flush(storage, partitions)
+            partitions, buffered, flushes = defaultdict(list), 0, flushes + 1
+
+    files += len(partitions)
+    archived += buffered if dry_run else _flush(storage, partitions)
+    return {'archived': archived, 'files': files, 'cutoff': cutoff, 'dry_run': dry_run}
+
+def read_archived(blobs, stub):
+    """Full document for an archive stub, from the cache or the archive file"""
+    document_id = stub['document_id']
+    with _cache_lock:
+        if document_id in _cache:
+            _cache.move_to_end(document_id)
+            return _cache[document_id]
+
+    payload = blobs.get(stub['archive_key'])
+    if payload is None:
+        raise LookupError(f"Archive file missing: {stub['archive_key']}")
+    document = None
+    for line in gzip.decompress(payload).splitlines():
+        candidate = json.loads(line)
+        if candidate.get('document_id') == document_id:
+            document = candidate
+            break
+    if document is None:
+        raise LookupError(f"Document {document_id} not found in {stub['archive_key']}")
+
+    document['archive_key'] = stub['archive_key']
+    with _cache_lock:
+        _cache[document_id] = document
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return document
+
+def read_archived_many(blobs, stubs):
+    """Full documents for many stubs, keyed by ID; each archive file is read once"""
+    documents = {}
+    by_key = {}
+    for stub in stubs:
+        with _cache_lock:
+            cached = _cache.get(stub['document_id'])
+        if cached is not None:
+            documents[stub['document_id']] = cached
+        else:
+            by_key.setdefault(stub['archive_key'], set()).add(stub['document_id'])
+
+    for archive_key, wanted in by_key.items():
+        payload = blobs.get(archive_key)
+        if payload is None:
+            raise LookupError(f"Archive file missing: {archive_key}")
+        for line in gzip.decompress(payload).splitlines():
+            candidate = json.loads(line)
+            if candidate.get('document_id') in wanted:
+                candidate['archive_key'] = archive_key
+                documents[candidate['document_id']] = candidate
+        missing = wanted - documents.keys()
+        if missing:
+            raise LookupError(f"Documents {', '.join(sorted(missing))} not found in {archive_key}")
+        with _cache_lock:
+            for document_id in wanted:
+                _cache[document_id] = documents[document_id]
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return documents
+
+if __name__ == '__main__':
+    import argparse
+    from storage import get_storage
+
+    parser = argparse.ArgumentParser(description='Archive old documents to compressed JSON lines')
+    parser.add_argument('--older-than-days', type=int, default=ARCHIVE_AGE_DAYS)
+    parser.add_argument('--dry-run', action='store_true', help='count documents without moving them')
+    args = parser.parse_args()
+    print(archive_documents(get_storage(), args.older_than_days, args.dry_run))
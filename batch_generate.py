@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Batch Invoice & Packing Slip Generator for M&J Toys Inc.
+Command-line replacement for Invoice_generator_old_sample/invoice_generator.py:
+parses a workbook with the Lambda order-processing code, renders every
+document with a pluggable backend on a persistent renderer pool, and
+skips documents whose output is up to date (a .sha256 file next to each
+output records the hash of what it was rendered from).
+
+Usage:
+    python batch_generate.py orders.xlsx --out-dir output --backend weasyprint --workers 4
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+# The generator only needs order processing and rendering, not the document store
+os.environ.setdefault('MJTOYS_STORAGE', 'memory')
+
+from document_renderer import order_hash, settings_version
+from excel_readers import read_excel_frame
+from lambda_function import orders_from_frame, get_settings
+from renderer_pool import ENGINES, RECYCLE_AFTER, RendererPool
+
+# Bump when rendering changes so every output is regenerated
+GENERATOR_VERSION = 1
+
+DOCUMENT_TYPES = ('invoice', 'packing_slip')
+
+def output_digest(document_type, order, settings, backend):
+    """Hash of everything an output depends on"""
+    payload = json.dumps([GENERATOR_VERSION, backend, document_type, order_hash(order), settings_version(settings)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def is_up_to_date(path, digest):
+    try:
+        with open(path + '.sha256') as f:
+            return f.read().strip() == digest and os.path.exists(path)
+    except OSError:
+        return False
+
+def write_output(path, payload, digest):
+    """Write a rendered document with its hash sidecar"""
+    # Write to a temp file and rename so an interrupted run never leaves a half file
+    partial = path + '.partial'
+    with open(partial, 'wb') as f:
+        f.write(payload)
+    os.replace(partial, path)
+    with open(path + '.sha256', 'w') as f:
+        f.write(digest + '\n')
+
+def plan_jobs(orders, settings, out_dir, backend, document_types, force=False):
+    """(job args, skipped count) for documents whose outputs are missing or stale"""
+    extension = ENGINES[backend].extension
+    jobs = []
+    skipped = 0
+    for order in orders:
+        for document_type in document_types:
+            path = os.path.join(out_dir, f"{document_type}_{order['Order_number']}.{extension}")
+            digest = output_digest(document_type, order, settings, backend)
+            if not force and is_up_to_date(path, digest):
+                skipped += 1
+                continue
+            jobs.append((document_type, order, settings, path, digest))
+    return jobs, skipped
+
+def generate(workbook, out_dir, backend='weasyprint', document_types=DOCUMENT_TYPES, workers=None,
+             settings=None, force=False, options=None, recycle_after=RECYCLE_AFTER):
+    """Generate all documents of a workbook. Returns {generated, skipped, failed, invalid_orders}."""
+    if backend not in ENGINES:
+        raise ValueError(f"Unknown backend: {backend}")
+    options = options or {}
+    settings = settings or get_settings()
+
+    with open(workbook, 'rb') as f:
+        orders, report = orders_from_frame(read_excel_frame(f.read()))
+    for error in report['errors']:
+        print(f"Row {error['row']} (order {error['order_number']}): {error['column']} {error['error']}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    jobs, skipped = plan_jobs(orders, settings, out_dir, backend, document_types, force)
+    print(f"{len(orders)} orders: {len(jobs)} documents to render, {skipped} up to date")
+
+    generated = 0
+    failed = 0
+    if not jobs:
+        return {'generated': 0, 'skipped': skipped, 'failed': 0, 'invalid_orders': report['invalid_orders']}
+
+    try:
+        with RendererPool(backend, workers, recycle_after, options=options) as pool:
+            for (_, _, _, path, digest), payload, error in pool.render_many(jobs):
+                if error:
+                    failed += 1
+                    print(f"Failed {path}: {error}")
+                    continue
+                write_output(path, payload, digest)
+                generated += 1
+                print(f"Generated {path}")
+    except RuntimeError as e:
+        # Health check failed: the documents not yet rendered all fail
+        print(f"Error: {str(e)}")
+        failed = len(jobs) - generated
+
+    return {'generated': generated, 'skipped': skipped, 'failed': failed,
+            'invalid_orders': report['invalid_orders']}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate invoices and packing slips from a workbook')
+    parser.add_argument('workbook', help='orders workbook (.xlsx, .xls or .xlsb)')
+    parser.add_argument('--out-dir', default='output')
+    parser.add_argument('--backend', choices=sorted(ENGINES), default='weasyprint')
+    parser.add_argument('--types', nargs='+', choices=DOCUMENT_TYPES, default=list(DOCUMENT_TYPES))
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--settings', help='JSON file of company settings (defaults to the built-in settings)')
+    parser.add_argument('--wkhtmltopdf', help='path to the wkhtmltopdf executable')
+    parser.add_argument('--recycle-after', type=int, default=RECYCLE_AFTER,
+                        help='documents each renderer worker handles before it is replaced')
+    parser.add_argument('--force', action='store_true', help='regenerate up-to-date outputs too')
+    args = parser.parse_args()
+
+    settings = None
+    if args.settings:
+        with open(args.settings) as f:
+            settings = json.load(f)
+
+    result = generate(args.workbook, args.out_dir, args.backend, args.types, args.workers,
+                      settings, args.force, {'wkhtmltopdf': args.wkhtmltopdf}, args.recycle_after)
+    print(f"Done: {result['generated']} generated, {result['skipped']} skipped, {result['failed']} failed")
+    raise SystemExit(1 if result['failed'] else 0)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the Excel reader engines (excel_readers.py)
+Reads synthetic workbooks of increasing size with every installed engine and
+with pd.read_excel(dtype=str), checks that each engine returns exactly the
+frame pandas does, and reports read times.
+
+Usage:
+    python benchmark_excel_readers.py --orders 100 1000 5000 --repeat 3
+    python benchmark_excel_readers.py --workbook orders.xls --workbook orders.xlsb
+"""
+
+import argparse
+import io
+import time
+
+import pandas as pd
+
+from excel_readers import available_engines, detect_format, read_excel_frame
+from synthetic_workbooks import synthetic_workbook
+
+# pandas engine used as the reference for each format
+PANDAS_ENGINES = {'xlsx': 'openpyxl', 'xls': 'xlrd', 'xlsb': 'pyxlsb'}
+
+def best_time(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def mismatched_columns(expected, actual):
+    """Columns whose strings differ from the pandas reference"""
+    if list(expected.columns) != list(actual.columns) or len(expected) != len(actual):
+        return ['<shape or header>']
+    return [
+        column for column in expected.columns
+        if not expected[column].fillna('<NA>').astype(str).equals(actual[column].fillna('<NA>').astype(str))
+    ]
+
+def benchmark(name, data, repeat):
+    fmt = detect_format(data)
+    reference_time, reference = best_time(
+        lambda: pd.read_excel(io.BytesIO(data), dtype=str, engine=PANDAS_ENGINES[fmt]), repeat)
+    print(f"\n{name}: {len(reference)} rows, {len(data) / 1024:.0f} KiB (.{fmt})")
+    print(f"  {'pd.read_excel':<14} {reference_time * 1000:9.1f} ms")
+
+    ok = True
+    for engine in available_engines(fmt):
+        elapsed, frame = best_time(lambda: read_excel_frame(data, engine), repeat)
+        mismatches = mismatched_columns(reference, frame)
+        ok = ok and not mismatches
+        status = 'identical' if not mismatches else f"MISMATCH in {', '.join(map(str, mismatches))}"
+        print(f"  {engine:<14} {elapsed * 1000:9.1f} ms  {reference_time / elapsed:5.1f}x  {status}")
+    return ok
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the Excel reader engines')
+    parser.add_argument('--orders', type=int, nargs='+', default=[100, 1000, 5000],
+                        help='sizes of the synthetic workbooks, in orders (about 8 lines each)')
+    parser.add_argument('--workbook', action='append', default=[], help='also benchmark this workbook file')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    ok = True
+    for orders in args.orders:
+        ok = benchmark(f'synthetic {orders} orders', synthetic_workbook(orders), args.repeat) and ok
+    for path in args.workbook:
+        with open(path, 'rb') as f:
+            ok = benchmark(path, f.read(), args.repeat) and ok
+    raise SystemExit(0 if ok else 1)
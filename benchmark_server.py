@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the standalone server (server.py)
+Drives the API routes over keep-alive connections and reports per-route
+throughput and latency percentiles.
+
+Usage:
+    python benchmark_server.py --url http://localhost:8000 --concurrency 16 --duration 30
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+SAMPLE_WORKBOOK = 'Invoice_generator_old_sample/template.xlsx'
+
+def build_routes(workbook_path):
+    """(name, method, path, body) for each benchmarked route"""
+    with open(workbook_path, 'rb') as f:
+        file_content = base64.b64encode(f.read()).decode('ascii')
+    return [
+        ('health', 'GET', '/health', None),
+        ('get-settings', 'GET', '/get-settings', None),
+        ('get-history', 'GET', '/get-history', None),
+        ('parse-excel', 'POST', '/parse-excel', json.dumps({'file_content': file_content})),
+    ]
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def worker(base_url, route, deadline, results, lock):
+    """Send requests on one persistent connection until the deadline"""
+    name, method, path, body = route
+    parts = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_class(parts.hostname, parts.port, timeout=60)
+    headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+    latencies = []
+    errors = 0
+
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    connection.close()
+    with lock:
+        results[name]['latencies'].extend(latencies)
+        results[name]['errors'] += errors
+
+def run_benchmark(base_url, routes, concurrency, duration):
+    """Benchmark each route in turn with `concurrency` keep-alive clients"""
+    results = {}
+    for route in routes:
+        name = route[0]
+        results[name] = {'latencies': [], 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+        threads = [
+            threading.Thread(target=worker, args=(base_url, route, deadline, results, lock))
+            for _ in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results[name]['elapsed'] = duration
+    return results
+
+def print_report(results):
+    print(f"{'route':<15}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, result in results.items():
+        latencies = sorted(result['latencies'])
+        print(f"{name:<15}{len(latencies):>10}{result['errors']:>8}"
+              f"{len(latencies) / result['elapsed']:>10.1f}"
+              f"{percentile(latencies, 50):>10.1f}{percentile(latencies, 95):>10.1f}"
+              f"{percentile(latencies, 99):>10.1f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the standalone M&J Toys API server')
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per route')
+    parser.add_argument('--workbook', default=SAMPLE_WORKBOOK, help='workbook posted to /parse-excel')
+    parser.add_argument('--routes', nargs='*', help='only benchmark these route names')
+    args = parser.parse_args()
+
+    routes = build_routes(args.workbook)
+    if args.routes:
+        routes = [route for route in routes if route[0] in args.routes]
+
+    print(f"Benchmarking {args.url} with {args.concurrency} connections, {args.duration}s per route")
+    print_report(run_benchmark(args.url, routes, args.concurrency, args.duration))
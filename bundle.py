@@ -0,0 +1,94 @@
+"""
+Print-ready bundles for M&J Toys Inc.
+Renders every invoice and packing slip of an upload into a zip of PDFs
+(streamed as documents render) or one merged PDF (held in memory until
+written, so limited to MAX_PDF_ORDERS orders)
+"""
+
+import io
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from document_renderer import render_document_pdf
+
+BUNDLE_FORMATS = {
+    'pdf': 'application/pdf',
+    'zip': 'application/zip',
+}
+
+DOCUMENT_TYPES = ('invoice', 'packing_slip')
+
+# PdfWriter keeps every page of a merged PDF in memory until it is written
+MAX_PDF_ORDERS = 200
+
+# Render threads per bundle
+MAX_WORKERS = 8
+
+# Order fields a bundle can be sorted by
+SORT_FIELDS = ('Order_number', 'Customer_ID', 'Recipient_Company', 'PO_No',
+               'Sales_rep', 'Ship_Date', 'State', 'Postal_Code')
+
+def bundle_jobs(orders, sort_by='Order_number', document_types=DOCUMENT_TYPES, collate='order'):
+    """
+    List (document_type, order) pairs in print order.
+    collate='order' keeps each order's documents together; 'type' prints all
+    invoices first, then all packing slips.
+    """
+    if sort_by not in SORT_FIELDS:
+        raise ValueError(f"Unsupported sort field: {sort_by}")
+    for document_type in document_types:
+        if document_type not in DOCUMENT_TYPES:
+            raise ValueError(f"Unknown document type: {document_type}")
+
+    ordered = sorted(orders, key=lambda o: (str(o.get(sort_by) or ''), str(o.get('Order_number'))))
+    if collate == 'type':
+        return [(t, o) for t in document_types for o in ordered]
+    return [(t, o) for o in ordered for t in document_types]
+
+def render_in_order(jobs, settings, max_workers=4):
+    """
+    Render jobs in parallel and yield (document_type, order, pdf_bytes) in job order.
+    At most 2 * max_workers rendered documents are held in memory at once.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for document_type, order in jobs:
+            future = executor.submit(render_document_pdf, document_type, order, settings)
+            pending.append((document_type, order, future))
+            if len(pending) >= max_workers * 2:
+                document_type, order, future = pending.popleft()
+                yield document_type, order, future.result()
+        while pending:
+            document_type, order, future = pending.popleft()
+            yield document_type, order, future.result()
+
+def write_bundle(stream, orders, settings, fmt='zip', sort_by='Order_number',
+                 document_types=DOCUMENT_TYPES, collate='order', max_workers=4):
+    """Render the bundle into a writable stream. Returns the number of documents"""
+    if fmt not in BUNDLE_FORMATS:
+        raise ValueError(f"Unsupported bundle format: {fmt}")
+    if fmt == 'pdf' and len(orders) > MAX_PDF_ORDERS:
+        raise ValueError(f"Merged PDF bundles are limited to {MAX_PDF_ORDERS} orders; use the zip format")
+
+    max_workers = max(1, min(int(max_workers), MAX_WORKERS))
+    jobs = bundle_jobs(orders, sort_by, document_types, collate)
+    rendered = render_in_order(jobs, settings, max_workers)
+    count = 0
+
+    if fmt == 'zip':
+        # Each PDF is compressed into the archive as soon as it is rendered
+        with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for index, (document_type, order, pdf_bytes) in enumerate(rendered, start=1):
+                archive.writestr(f"{index:05d}_{document_type}_{order['Order_number']}.pdf", pdf_bytes)
+                count += 1
+    else:
+        from pypdf import PdfWriter
+
+        writer = PdfWriter()
+        for document_type, order, pdf_bytes in rendered:
+            writer.append(io.BytesIO(pdf_bytes))
+            count += 1
+        writer.write(stream)
+
+    return count
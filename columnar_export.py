@@ -0,0 +1,170 @@
+"""
+Columnar Export for M&J Toys Inc.
+Writes parsed orders and line items as Parquet or Arrow IPC tables
+"""
+
+import io
+import os
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# File extension per supported export format
+EXPORT_FORMATS = {
+    'parquet': 'parquet',
+    'arrow': 'arrow',
+}
+
+# Typed schema for the orders table (one row per order)
+ORDERS_SCHEMA = pa.schema([
+    ('Order_number', pa.string()),
+    ('Invoice_Date', pa.date32()),
+    ('SO_Date', pa.date32()),
+    ('Ship_Date', pa.date32()),
+    ('Date_Paid', pa.date32()),
+    ('Customer_ID', pa.string()),
+    ('SO_No', pa.string()),
+    ('PO_No', pa.string()),
+    ('Sales_rep', pa.string()),
+    ('ship_via', pa.string()),
+    ('Terms', pa.string()),
+    ('Recipient_Name', pa.string()),
+    ('Recipient_Company', pa.string()),
+    ('Address1', pa.string()),
+    ('Address2', pa.string()),
+    ('City', pa.string()),
+    ('State', pa.string()),
+    ('Postal_Code', pa.string()),
+    ('Country_Code', pa.string()),
+    ('Phone', pa.string()),
+    ('Fax', pa.string()),
+    ('Discount', pa.float64()),
+    ('Shipping_Handling', pa.float64()),
+    ('Total_Case', pa.int64()),
+    ('Total_WT', pa.float64()),
+    ('Vol', pa.float64()),
+    ('Total_qty', pa.int64()),
+    ('Total_Amount', pa.float64()),
+    ('Total_Discount', pa.float64()),
+    ('Total_Discounted_Amount', pa.float64()),
+    ('Sales_Amount', pa.float64()),
+])
+
+# Typed schema for the line items table (one row per line, keyed by Order_number)
+LINE_ITEMS_SCHEMA = pa.schema([
+    ('Order_number', pa.string()),
+    ('line_number', pa.string()),
+    ('Order_Unit', pa.int64()),
+    ('unit', pa.string()),
+    ('Pack', pa.int64()),
+    ('Item_no', pa.string()),
+    ('Description', pa.string()),
+    ('Ship_Qty', pa.int64()),
+    ('Net_Price', pa.float64()),
+    ('Extended_Price', pa.float64()),
+    ('Weight', pa.float64()),
+    ('Volume', pa.float64()),
+    ('Loc', pa.string()),
+])
+
+def _frame_to_table(df, schema):
+    """Coerce a DataFrame to the given schema and build an Arrow table"""
+    df = df.reindex(columns=schema.names)
+    for field in schema:
+        col = df[field.name]
+        if pa.types.is_date32(field.type):
+            df[field.name] = pd.to_datetime(col, format='%m/%d/%Y', errors='coerce').dt.date
+        elif pa.types.is_integer(field.type):
+            df[field.name] = pd.to_numeric(col, errors='coerce').fillna(0).astype('int64')
+        elif pa.types.is_floating(field.type):
+            df[field.name] = pd.to_numeric(col, errors='coerce').astype('float64')
+        else:
+            # Object first: an all-blank column is float64, where NaN survives where()
+            df[field.name] = col.astype(object).where(col.notna(), None).map(lambda v: v if v is None else str(v))
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+def orders_to_tables(orders):
+    """Split parsed orders into typed orders and line items Arrow tables"""
+    order_rows = []
+    line_rows = []
+    for order in orders:
+        order_rows.append({k: v for k, v in order.items() if k != 'line_items'})
+        for item in order.get('line_items', []):
+            line_rows.append({'Order_number': order['Order_number'], **item})
+
+    orders_table = _frame_to_table(pd.DataFrame(order_rows), ORDERS_SCHEMA)
+    line_items_table = _frame_to_table(pd.DataFrame(line_rows), LINE_ITEMS_SCHEMA)
+    return orders_table, line_items_table
+
+def _serialize_table(table, fmt):
+    """Serialize an Arrow table to bytes in the requested format"""
+    sink = io.BytesIO()
+    if fmt == 'parquet':
+        pq.write_table(table, sink, compression='snappy')
+    else:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
+
+def export_orders(orders, destination, fmt='parquet', blobs=None, allow_local=False):
+    """
+    Write orders and line items tables to the blob store (s3://bucket/prefix)
+    or, with allow_local (command line only), a local directory. Returns the
+    location of each written table.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    prefix = None
+    if destination.startswith('s3://'):
+        bucket, _, prefix = destination[len('s3://'):].partition('/')
+        if getattr(blobs, 'bucket', bucket) != bucket:
+            raise ValueError(f"Exports can only be written to the {blobs.bucket} bucket")
+    elif not allow_local:
+        raise ValueError('Export destination must be an s3:// prefix')
+
+    orders_table, line_items_table = orders_to_tables(orders)
+    extension = EXPORT_FORMATS[fmt]
+    outputs = {}
+
+    for name, table in (('orders', orders_table), ('line_items', line_items_table)):
+        payload = _serialize_table(table, fmt)
+        filename = f'{name}.{extension}'
+
+        if prefix is not None:
+            key = f"{prefix.rstrip('/')}/{filename}" if prefix else filename
+            blobs.put(key, payload, content_type='application/octet-stream')
+            outputs[name] = blobs.uri(key)
+        else:
+            os.makedirs(destination, exist_ok=True)
+            path = os.path.join(destination, filename)
+            with open(path, 'wb') as f:
+                f.write(payload)
+            outputs[name] = path
+
+        print(f"Exported {table.num_rows} {name} rows to {outputs[name]}")
+
+    return outputs
+
+def default_export_prefix(bucket):
+    """Timestamped S3 prefix for exports when the caller doesn't pick one"""
+    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    return f's3://{bucket}/exports/{timestamp}'
+
+if __name__ == '__main__':
+    import argparse
+    import base64
+
+    parser = argparse.ArgumentParser(description='Export the orders of a workbook as Parquet or Arrow tables')
+    parser.add_argument('workbook', help='orders workbook')
+    parser.add_argument('destination', help='local directory')
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='parquet')
+    args = parser.parse_args()
+
+    from lambda_function import parse_excel_file
+
+    with open(args.workbook, 'rb') as f:
+        orders = parse_excel_file(base64.b64encode(f.read()).decode('ascii'))
+    export_orders(orders, args.destination, fmt=args.format, allow_local=True)
@@ -63,6 +63,34 @@ def create_dynamodb_tables():
                 'WriteCapacityUnits': 5
             }
         },
+        {
+            'TableName': 'MJToys_DocumentIndex',
+            'KeySchema': [
+                {'AttributeName': 'term', 'KeyType': 'HASH'},  # Partition key, e.g. order#10802
+                {'AttributeName': 'sort_key', 'KeyType': 'RANGE'},  # created_at#document_id
+            ],
+            'AttributeDefinitions': [
+                {'AttributeName': 'term', 'AttributeType': 'S'},
+                {'AttributeName': 'sort_key', 'AttributeType': 'S'},
+            ],
+            'ProvisionedThroughput': {
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        },
+        {
+            'TableName': 'MJToys_Aggregates',
+            'KeySchema': [
+                {'AttributeName': 'bucket', 'KeyType': 'HASH'},  # e.g. customer#CA9447, day#2024-02-01
+            ],
+            'AttributeDefinitions': [
+                {'AttributeName': 'bucket', 'AttributeType': 'S'},
+            ],
+            'ProvisionedThroughput': {
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        },
         {
             'TableName': 'MJToys_FieldEdits',
             'KeySchema': [
@@ -129,6 +157,8 @@ def create_dynamodb_tables():
     print("  1. MJToys_Documents - Stores generated invoices and packing slips")
     print("  2. MJToys_Settings - Stores company configuration")
     print("  3. MJToys_FieldEdits - Stores user field edits")
+    print("  4. MJToys_DocumentIndex - Search index over saved documents")
+    print("  5. MJToys_Aggregates - Sales totals by customer, sales rep and day")
     print("\nYou can now run your Lambda function and React application!")
 
 if __name__ == '__main__':
@@ -38,6 +38,25 @@ echo "📋 Step 3: Copying Lambda function..."
 cp lambda_function.py package/
 cp invoice_template.py package/
 cp packing_slip_template.py package/
+cp columnar_export.py package/
+cp pagination.py package/
+cp document_renderer.py package/
+cp s3_multipart.py package/
+cp bundle.py package/
+cp order_barcode.py package/
+cp logo_assets.py package/
+cp storage.py package/
+cp search_index.py package/
+cp sales_aggregates.py package/
+cp document_versions.py package/
+cp validation.py package/
+cp incremental_parse.py package/
+cp document_export.py package/
+cp archive.py package/
+cp document_codec.py package/
+cp rendered_pdfs.py package/
+cp excel_readers.py package/
+cp metrics.py package/
 
 echo ""
 echo "📦 Step 4: Creating deployment package..."
@@ -0,0 +1,135 @@
+"""
+Document Codec for M&J Toys Inc.
+Stores a document's line items as one zlib-compressed binary attribute
+instead of a map per line, and moves documents that would still be too big
+for a table item (DynamoDB's limit is 400 KB) to the blob store behind a
+pointer record. Reads reassemble the original document transparently.
+"""
+
+import gzip
+import json
+import os
+import threading
+import zlib
+
+# Encoded item size above which the whole document moves to the blob store
+OVERFLOW_BYTES = int(os.environ.get('MJTOYS_DOCUMENT_OVERFLOW_BYTES', '350000'))
+
+OVERFLOW_PREFIX = 'documents'
+LINE_ITEMS_ENCODING = 'zlib-json'
+
+_stats_lock = threading.Lock()
+_stats = {'documents': 0, 'raw_bytes': 0, 'stored_bytes': 0, 'overflowed': 0}
+
+def _json_default(obj):
+    # DynamoDB numbers come back as Decimal
+    return int(obj) if obj == obj.to_integral_value() else float(obj)
+
+def _binary(value):
+    """bytes from a stored binary attribute (boto3 wraps them in Binary)"""
+    return bytes(getattr(value, 'value', value))
+
+def codec_stats():
+    """Compression totals since the container started"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['compression_ratio'] = round(stats['raw_bytes'] / stats['stored_bytes'], 2) if stats['stored_bytes'] else None
+    return stats
+
+def _record(raw_bytes, stored_bytes, overflowed):
+    with _stats_lock:
+        _stats['documents'] += 1
+        _stats['raw_bytes'] += raw_bytes
+        _stats['stored_bytes'] += stored_bytes
+        _stats['overflowed'] += int(overflowed)
+
+def overflow_key(document_id):
+    return f'{OVERFLOW_PREFIX}/{document_id}.json.gz'
+
+def encode_document(document):
+    """
+    (table item, overflow) for a document, the input not modified. overflow is
+    None or (blob key, gzip payload) to write once the item is stored.
+    """
+    order = document.get('order_data')
+    if not isinstance(order, dict) or 'line_items' not in order:
+        return document, None
+
+    raw = json.dumps(document, default=_json_default).encode('utf-8')
+    header = {k: v for k, v in order.items() if k != 'line_items'}
+    line_items = json.dumps(order['line_items'], default=_json_default).encode('utf-8')
+    compressed = zlib.compress(line_items, 6)
+    item = dict(document, order_data=dict(header, line_items_z=compressed,
+                                          line_items_encoding=LINE_ITEMS_ENCODING))
+
+    stored = len(raw) - len(line_items) + len(compressed)
+    overflow = None
+    if stored > OVERFLOW_BYTES:
+        key = overflow_key(document['document_id'])
+        overflow = (key, gzip.compress(raw))
+        item = dict(document, order_data=header, overflow_key=key)
+        # The pointer record plus the blob holding the whole document
+        stored = len(json.dumps(item, default=_json_default)) + len(overflow[1])
+
+    _record(len(raw), stored, overflow is not None)
+    print(f"Document codec: {document['document_id']} {len(raw)} -> {stored} bytes"
+          f"{' (moved to blob store)' if overflow else ''}")
+    return item, overflow
+
+def decode_document(item, blobs):
+    """Original document from a table item"""
+    if not item:
+        return item
+    if item.get('overflow_key'):
+        payload = blobs.get(item['overflow_key'])
+        if payload is None:
+            raise LookupError(f"Overflow blob missing: {item['overflow_key']}")
+        return json.loads(gzip.decompress(payload))
+
+    order = item.get('order_data')
+    if isinstance(order, dict) and 'line_items_z' in order:
+        order = dict(order)
+        line_items = json.loads(zlib.decompress(_binary(order.pop('line_items_z'))))
+        order.pop('line_items_encoding', None)
+        order['line_items'] = line_items
+        item = dict(item, order_data=order)
+    return item
+
+class EncodedDocumentRepository:
+    """Wraps a document repository, encoding on write and decoding on read"""
+
+    def __init__(self, documents, blobs):
+        self.documents = documents
+        self.blobs = blobs
+
+    def get(self, document_id):
+        return decode_document(self.documents.get(document_id), self.blobs)
+
+    def get_many(self, document_ids):
+        return {d: decode_document(item, self.blobs) for d, item in self.documents.get_many(document_ids).items()}
+
+    def _write_overflow(self, overflow):
+        if overflow:
+            key, payload = overflow
+            self.blobs.put(key, payload, content_type='application/gzip')
+
+    def put(self, item):
+        item, overflow = encode_document(item)
+        # Blob first, so the pointer never names a missing blob
+        self._write_overflow(overflow)
+        self.documents.put(item)
+
+    def put_if_absent(self, item):
+        item, overflow = encode_document(item)
+        # Blob before the pointer, as in put(); an existing blob belongs to an
+        # identical earlier save and is left alone
+        if overflow and not self.blobs.exists(overflow[0]):
+            self._write_overflow(overflow)
+        return self.documents.put_if_absent(item)
+
+    def scan(self):
+        return [decode_document(item, self.blobs) for item in self.documents.scan()]
+
+    def scan_segment(self, segment, total_segments):
+        for items, units in self.documents.scan_segment(segment, total_segments):
+            yield [decode_document(item, self.blobs) for item in items], units
@@ -0,0 +1,247 @@
+"""
+Bulk Document Export for M&J Toys Inc.
+Scans saved documents with parallel segment workers, flattens each order to
+one row per line item and streams CSV, JSON lines or XLSX into the blob store
+(an S3 multipart upload in production). Reads are paced to a read-capacity
+budget so an export doesn't starve production traffic.
+
+Only the latest version of each document is exported by default, matching
+/reports: a pre-scan collects the previous_version_id of every document and
+those superseded versions are skipped. With all_versions every version is
+written; its version, previous_version_id and content_hash columns identify
+superseded rows (a document_id that appears as another row's
+previous_version_id is superseded).
+
+Usage:
+    python document_export.py --format csv --month 2024-02
+    python document_export.py --all-versions
+"""
+
+import csv
+import io
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+
+from columnar_export import ORDERS_SCHEMA, LINE_ITEMS_SCHEMA
+
+# Output format -> content type
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+DEFAULT_SEGMENTS = 8
+MAX_SEGMENTS = 32
+
+# Read capacity units per second the export may consume (0 = unpaced)
+DEFAULT_MAX_READ_UNITS = 100
+
+DOCUMENT_COLUMNS = ['document_id', 'document_type', 'created_at', 'version', 'previous_version_id', 'content_hash']
+ORDER_COLUMNS = list(ORDERS_SCHEMA.names)
+LINE_COLUMNS = [name for name in LINE_ITEMS_SCHEMA.names if name != 'Order_number']
+COLUMNS = DOCUMENT_COLUMNS + ORDER_COLUMNS + LINE_COLUMNS
+
+class ReadPacer:
+    """Token bucket shared by the scan workers, refilled at max_units_per_second"""
+
+    def __init__(self, max_units_per_second):
+        self.rate = max_units_per_second
+        self.lock = threading.Lock()
+        self.available = max_units_per_second
+        self.updated = time.monotonic()
+
+    def consume(self, units):
+        if not self.rate or not units:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.available = min(self.rate, self.available + (now - self.updated) * self.rate)
+            self.updated = now
+            self.available -= units
+            wait = -self.available / self.rate if self.available < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+def flatten_document(document):
+    """One row per line item (or a single row for an order without lines)"""
+    order = document.get('order_data') or {}
+    base = {column: _plain(document.get(column, '')) for column in DOCUMENT_COLUMNS}
+    for column in ORDER_COLUMNS:
+        base[column] = _plain(order.get(column, ''))
+    items = order.get('line_items') or [{}]
+    return [dict(base, **{column: _plain(item.get(column, '')) for column in LINE_COLUMNS}) for item in items]
+
+def _wanted(document, document_type, month):
+    if document_type and document.get('document_type') != document_type:
+        return False
+    if month and not str(document.get('created_at', '')).startswith(month):
+        return False
+    return True
+
+def resolve_archived(documents, blobs):
+    """Replace archive stubs with the full documents from the archive tier"""
+    stubs = [document for document in documents if document.get('archive_key')]
+    if not stubs:
+        return documents
+    if blobs is None:
+        raise LookupError(f"{len(stubs)} archived documents need the blob store to be read")
+    from archive import read_archived_many
+    archived = read_archived_many(blobs, stubs)
+    return [archived[document['document_id']] if document.get('archive_key') else document
+            for document in documents]
+
+def superseded_ids(documents, segments=DEFAULT_SEGMENTS, max_read_units=DEFAULT_MAX_READ_UNITS):
+    """IDs of documents a later version supersedes, from a parallel pre-scan"""
+    segments = max(1, min(int(segments), MAX_SEGMENTS))
+    pacer = ReadPacer(max_read_units)
+    # Raw table items carry previous_version_id; no need to decode line items or overflow blobs
+    table = getattr(documents, 'documents', documents)
+
+    def collect(segment):
+        ids = set()
+        for items, units in table.scan_segment(segment, segments):
+            pacer.consume(units)
+            ids.update(d['previous_version_id'] for d in items if d.get('previous_version_id'))
+        return ids
+
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        return set().union(*executor.map(collect, range(segments)))
+
+def _scan_worker(documents, blobs, segment, total_segments, pacer, rows, stop, document_type, month, skip_ids):
+    for items, units in documents.scan_segment(segment, total_segments):
+        if stop.is_set():
+            return
+        pacer.consume(units)
+        wanted = resolve_archived([d for d in items if _wanted(d, document_type, month)
+                                   and d.get('document_id') not in skip_ids], blobs)
+        batch = []
+        for document in wanted:
+            batch.extend(flatten_document(document))
+        if batch:
+            rows.put(batch)
+
+def scan_rows(documents, document_type=None, month=None, segments=DEFAULT_SEGMENTS,
+              max_read_units=DEFAULT_MAX_READ_UNITS, blobs=None, skip_ids=()):
+    """
+    Yield batches of flattened rows from a parallel scan, as pages arrive.
+    Archived documents are read through from blobs; without it they raise.
+    Documents whose ID is in skip_ids are left out.
+    """
+    segments = max(1, min(int(segments), MAX_SEGMENTS))
+    pacer = ReadPacer(max_read_units)
+    # Bounded so scan workers wait for the writer instead of buffering the table
+    rows = queue.Queue(maxsize=segments * 2)
+    stop = threading.Event()
+    done = object()
+
+    def run(segment):
+        try:
+            _scan_worker(documents, blobs, segment, segments, pacer, rows, stop, document_type, month, skip_ids)
+        finally:
+            rows.put(done)
+
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        futures = [executor.submit(run, segment) for segment in range(segments)]
+        try:
+            finished = 0
+            while finished < segments:
+                batch = rows.get()
+                if batch is done:
+                    finished += 1
+                else:
+                    yield batch
+        finally:
+            stop.set()
+            # Unblock workers still waiting to hand over a batch
+            while any(not future.done() for future in futures):
+                try:
+                    rows.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        for future in futures:
+            future.result()
+
+def _write_csv(stream, batches):
+    count = 0
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        count += len(batch)
+        stream.write(buffer.getvalue().encode('utf-8'))
+        buffer.seek(0)
+        buffer.truncate()
+    stream.write(buffer.getvalue().encode('utf-8'))
+    return count
+
+def _write_jsonl(stream, batches):
+    count = 0
+    for batch in batches:
+        stream.write(''.join(json.dumps(row) + '\n' for row in batch).encode('utf-8'))
+        count += len(batch)
+    return count
+
+def _write_xlsx(stream, batches):
+    from openpyxl import Workbook
+
+    # Write-only mode keeps memory flat: rows go to a temp file until save
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Documents')
+    sheet.append(COLUMNS)
+    count = 0
+    for batch in batches:
+        for row in batch:
+            sheet.append([row[column] for column in COLUMNS])
+        count += len(batch)
+    workbook.save(stream)
+    return count
+
+WRITERS = {'csv': _write_csv, 'jsonl': _write_jsonl, 'xlsx': _write_xlsx}
+
+def export_documents(storage, fmt='csv', document_type='invoice', month=None,
+                     segments=DEFAULT_SEGMENTS, max_read_units=DEFAULT_MAX_READ_UNITS, all_versions=False):
+    """Export matching documents to the blob store. Returns {key, rows}."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if month:
+        datetime.strptime(month, '%Y-%m')
+
+    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    key = f"exports/documents/{month or 'all'}_{document_type or 'all'}_{timestamp}.{fmt}"
+    skip_ids = set() if all_versions else superseded_ids(storage.documents, segments, max_read_units)
+    batches = scan_rows(storage.documents, document_type, month, segments, max_read_units, storage.blobs, skip_ids)
+
+    with storage.blobs.open_writer(key, content_type=EXPORT_FORMATS[fmt]) as stream:
+        rows = WRITERS[fmt](stream, batches)
+
+    print(f"Exported {rows} rows to {storage.blobs.uri(key)}")
+    return {'key': key, 'rows': rows}
+
+if __name__ == '__main__':
+    import argparse
+    from storage import get_storage
+
+    parser = argparse.ArgumentParser(description='Export saved documents')
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+    parser.add_argument('--document-type', default='invoice', help="'' for every type")
+    parser.add_argument('--month', help='YYYY-MM of created_at')
+    parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS)
+    parser.add_argument('--max-read-units', type=float, default=DEFAULT_MAX_READ_UNITS,
+                        help='read capacity units per second (0 = unpaced)')
+    parser.add_argument('--all-versions', action='store_true', help='also export superseded versions')
+    args = parser.parse_args()
+
+    export_documents(get_storage(), args.format, args.document_type or None, args.month,
+                     args.segments, args.max_read_units, args.all_versions)
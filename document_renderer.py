@@ -0,0 +1,173 @@
+"""
+Server-side HTML rendering of invoices and packing slips for M&J Toys Inc.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from jinja2 import Environment
+from markupsafe import Markup, escape
+
+from order_barcode import barcode_data_uri
+import invoice_template
+import packing_slip_template
+from logo_assets import logo_data_uri
+from pagination import paginate_line_items
+
+# Compile templates once per container
+_env = Environment(autoescape=True)
+
+# Shell parts (settings only) and per-order fragment of each document type
+FRAGMENTS = {
+    'invoice': {
+        'title': 'Invoice',
+        'styles': Markup(invoice_template.INVOICE_STYLES),
+        'company_header': _env.from_string(invoice_template.INVOICE_COMPANY_HEADER),
+        'footer': _env.from_string(invoice_template.INVOICE_FOOTER),
+        'fragment': _env.from_string(invoice_template.INVOICE_FRAGMENT),
+    },
+    'packing_slip': {
+        'title': 'Packing List',
+        'styles': Markup(packing_slip_template.PACKING_SLIP_STYLES),
+        'company_header': _env.from_string(packing_slip_template.PACKING_SLIP_COMPANY_HEADER),
+        'footer': _env.from_string(packing_slip_template.PACKING_SLIP_FOOTER),
+        'fragment': _env.from_string(packing_slip_template.PACKING_SLIP_FRAGMENT),
+    },
+}
+
+# Documents stitched into one batch each start on a new page
+BATCH_STYLES = Markup('<style>.document + .document { page-break-before: always; }</style>')
+
+_shells = {}
+_shells_lock = threading.Lock()
+
+def render_shell(document_type, settings):
+    """Pre-rendered company header and footer, cached per settings version"""
+    if document_type not in FRAGMENTS:
+        raise ValueError(f"Unknown document type: {document_type}")
+
+    key = (document_type, settings_version(settings))
+    with _shells_lock:
+        shell = _shells.get(key)
+    if shell is None:
+        parts = FRAGMENTS[document_type]
+        logo_src, embedded = logo_data_uri(settings)
+        shell = {
+            'company_header': Markup(parts['company_header'].render(settings=settings, logo_src=logo_src)),
+            'footer': Markup(parts['footer'].render(settings=settings)),
+        }
+        # Retry a failed logo fetch on a later render instead of caching the fallback
+        if embedded or logo_src is None:
+            with _shells_lock:
+                # One settings version at a time
+                if any(k[1] != key[1] for k in _shells):
+                    _shells.clear()
+                _shells[key] = shell
+    return shell
+
+def render_fragment(document_type, order, settings, shell):
+    """Body markup of one document, with the pre-rendered shell parts stitched in"""
+    pages = paginate_line_items(order.get('line_items', []), document_type)
+    order_number = str(order.get('Order_number') or '')
+    return FRAGMENTS[document_type]['fragment'].render(
+        order=order,
+        settings=settings,
+        pages=pages,
+        company_header=shell['company_header'],
+        footer=shell['footer'],
+        barcode_uri=barcode_data_uri(order_number) if order_number else None,
+    )
+
+def _html_document(title, styles, body):
+    return (
+        '<!DOCTYPE html>\n<html lang="en">\n<head>\n    <meta charset="UTF-8">\n'
+        '    <meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+        f'    <title>{escape(title)}</title>{styles}</head>\n<body>{body}</body>\n</html>\n'
+    )
+
+def render_document_html(document_type, order, settings, inline_styles=True):
+    """
+    Render an invoice or packing slip with pre-paginated line items. Pass
+    inline_styles=False when the engine applies document_stylesheet() itself.
+    """
+    shell = render_shell(document_type, settings)
+    title = f"{FRAGMENTS[document_type]['title']} {order.get('Order_number') or ''}"
+    body = render_fragment(document_type, order, settings, shell)
+    styles = FRAGMENTS[document_type]['styles'] if inline_styles else ''
+    return _html_document(title, styles, body)
+
+def document_stylesheet(document_type):
+    """CSS of a document type without the <style> wrapper"""
+    styles = str(FRAGMENTS[document_type]['styles']).strip()
+    return styles.removeprefix('<style>').removesuffix('</style>')
+
+def render_batch_html(document_type, orders, settings):
+    """
+    One HTML document for many orders: the styles, company header and footer
+    are rendered once and each order's fragment is stitched in on its own page.
+    """
+    shell = render_shell(document_type, settings)
+    fragments = ''.join(
+        f'<div class="document">{render_fragment(document_type, order, settings, shell)}</div>'
+        for order in orders
+    )
+    title = f"{FRAGMENTS[document_type]['title']}s ({len(orders)})"
+    return _html_document(title, FRAGMENTS[document_type]['styles'] + BATCH_STYLES, fragments)
+
+# Rendered previews kept per container
+RENDER_CACHE_SIZE = int(os.environ.get('MJTOYS_RENDER_CACHE_SIZE', '256'))
+
+_render_cache = OrderedDict()
+_render_cache_version = None
+_render_cache_lock = threading.Lock()
+
+def _json_default(obj):
+    # DynamoDB numbers come back as Decimal
+    return int(obj) if obj == obj.to_integral_value() else float(obj)
+
+def settings_version(settings):
+    """Version stamp of the settings (a content hash for settings saved without one)"""
+    if settings.get('settings_version'):
+        return str(settings['settings_version'])
+    payload = json.dumps(settings, sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+def order_hash(order):
+    payload = json.dumps(order, sort_keys=True, separators=(',', ':'), default=_json_default)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def render_document_html_cached(document_type, order, settings):
+    """
+    render_document_html memoized in a bounded LRU keyed by document type and
+    order hash. The cache belongs to one settings version: a different version
+    drops every entry. Returns (html, cache_hit).
+    """
+    global _render_cache_version
+    version = settings_version(settings)
+    key = (document_type, order_hash(order))
+    with _render_cache_lock:
+        if version != _render_cache_version:
+            _render_cache.clear()
+            _render_cache_version = version
+        html = _render_cache.get(key)
+        if html is not None:
+            _render_cache.move_to_end(key)
+            return html, True
+
+    html = render_document_html(document_type, order, settings)
+    with _render_cache_lock:
+        if version == _render_cache_version:
+            _render_cache[key] = html
+            while len(_render_cache) > RENDER_CACHE_SIZE:
+                _render_cache.popitem(last=False)
+    return html, False
+
+def render_document_pdf(document_type, order, settings):
+    """Render an invoice or packing slip to PDF bytes with WeasyPrint"""
+    from weasyprint import HTML
+
+    html = render_document_html(document_type, order, settings)
+    return HTML(string=html).write_pdf()
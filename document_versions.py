@@ -0,0 +1,82 @@
+"""
+Document Versioning for M&J Toys Inc.
+Saved documents get a deterministic ID derived from the document type, order
+number, a hash of their content and the version they supersede, and are
+written with a conditional put. Re-saving the content of the latest version
+is a no-op; anything else, including a revert to an earlier version's
+content, becomes a new version linked to the previous one through
+previous_version_id.
+"""
+
+import hashlib
+import json
+import re
+
+from search_index import search_documents
+
+# Bookkeeping fields that don't count as document content
+METADATA_FIELDS = ('document_id', 'created_at', 'content_hash', 'version', 'previous_version_id')
+
+# Hex digits of the content hash kept in the document ID
+ID_HASH_LENGTH = 16
+
+def content_hash(document):
+    """SHA-256 of the document content in canonical JSON form"""
+    content = {k: v for k, v in document.items() if k not in METADATA_FIELDS}
+    canonical = json.dumps(content, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def _order_number(document):
+    order = document.get('order_data') or {}
+    return str(document.get('order_number') or order.get('Order_number') or '').strip()
+
+def document_id_for(document, digest, previous_id=None):
+    """e.g. invoice-10802-3f2a9c0d1b7e4a65"""
+    if previous_id:
+        # A revert to earlier content gets a new ID, not the earlier version's
+        digest = hashlib.sha256(f'{digest}:{previous_id}'.encode('utf-8')).hexdigest()
+    document_type = re.sub(r'[^0-9A-Za-z_]+', '_', document.get('document_type') or 'document')
+    order_number = re.sub(r'[^0-9A-Za-z_.]+', '-', _order_number(document)).strip('-') or 'none'
+    return f'{document_type}-{order_number}-{digest[:ID_HASH_LENGTH]}'
+
+def latest_version(storage, document):
+    """Newest saved document of the same type and order number, if any"""
+    order_number = _order_number(document)
+    if not order_number:
+        return None
+    params = {'order_number': order_number, 'limit': 10}
+    if document.get('document_type'):
+        params['document_type'] = document['document_type']
+    for summary in search_documents(storage.index, params)['results']:
+        document = storage.documents.get(summary['document_id'])
+        if document and document.get('archive_key'):
+            # Archive stubs lack the line items and totals a retraction needs
+            from archive import read_archived
+            document = read_archived(storage.blobs, document)
+        return document
+    return None
+
+def save_document(storage, document):
+    """
+    Save a new document version. Returns (document, created, previous) where
+    created is False when the content matches the latest version, and previous
+    is the version this one supersedes.
+    """
+    digest = content_hash(document)
+    document['content_hash'] = digest
+
+    previous = latest_version(storage, document)
+    if previous is not None and previous.get('content_hash') == digest:
+        return previous, False, None
+
+    document['document_id'] = document_id_for(document, digest, previous and previous['document_id'])
+    if previous is not None:
+        document['previous_version_id'] = previous['document_id']
+        document['version'] = int(previous.get('version') or 1) + 1
+    else:
+        document['version'] = 1
+
+    # A concurrent save of the same content over the same version got there first
+    if not storage.documents.put_if_absent(document):
+        return storage.documents.get(document['document_id']) or document, False, None
+    return document, True, previous
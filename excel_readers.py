@@ -0,0 +1,203 @@
+"""
+Excel reader engines for M&J Toys Inc.
+Reads the first sheet of an .xlsx, .xls or .xlsb workbook into a DataFrame of
+raw string cells, the same frame pd.read_excel(..., dtype=str) returns:
+integral numbers without a decimal point, dates as 'YYYY-MM-DD HH:MM:SS',
+blank and NA-like cells as NaN, blank or repeated headers as 'Unnamed: n'
+and 'name.1'. Every engine goes through the same cell conversion, so the
+choice of engine never changes the parsed orders.
+
+Engines, in order of preference:
+    calamine   python-calamine (Rust), reads all three formats
+    openpyxl   openpyxl read-only mode, .xlsx
+    xlrd       .xls
+    pyxlsb     .xlsb (no date detection: dates read as serial numbers, as in pandas)
+
+MJTOYS_EXCEL_ENGINE picks one explicitly; the default 'auto' uses the first
+installed engine that reads the workbook's format.
+"""
+
+import io
+import math
+import os
+import zipfile
+from collections import defaultdict
+from datetime import date, datetime, time
+
+import pandas as pd
+from pandas._libs.parsers import STR_NA_VALUES
+
+from validation import WorkbookError
+
+EXCEL_ENGINE = os.environ.get('MJTOYS_EXCEL_ENGINE', 'auto')
+
+# Excel error values; pandas reads error cells as NaN
+ERROR_VALUES = {'#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A', '#GETTING_DATA'}
+
+_NA_STRINGS = frozenset(STR_NA_VALUES) | ERROR_VALUES
+
+NAN = float('nan')
+
+def detect_format(data):
+    """'xlsx', 'xlsb' or 'xls' from the workbook's leading bytes"""
+    if data[:8] == b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1':
+        return 'xls'
+    if data[:4] == b'PK\x03\x04':
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                names = archive.namelist()
+        except zipfile.BadZipFile:
+            raise WorkbookError('The workbook is damaged and cannot be opened')
+        return 'xlsb' if 'xl/workbook.bin' in names else 'xlsx'
+    raise WorkbookError('Not an Excel workbook (.xlsx, .xls or .xlsb)')
+
+def _rows_calamine(data, fmt):
+    from python_calamine import CalamineWorkbook
+
+    workbook = CalamineWorkbook.from_filelike(io.BytesIO(data))
+    return workbook.get_sheet_by_index(0).to_python(skip_empty_area=False)
+
+def _rows_openpyxl(data, fmt):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        # Saved dimensions are often wrong; scan the real extent
+        sheet.reset_dimensions()
+        return [list(row) for row in sheet.iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+def _rows_xlrd(data, fmt):
+    import xlrd
+
+    workbook = xlrd.open_workbook(file_contents=data, on_demand=True)
+    try:
+        sheet = workbook.sheet_by_index(0)
+        rows = []
+        for i in range(sheet.nrows):
+            row = []
+            for value, kind in zip(sheet.row_values(i), sheet.row_types(i)):
+                if kind == xlrd.XL_CELL_DATE:
+                    value = xlrd.xldate.xldate_as_datetime(value, workbook.datemode)
+                    # Time-only cells sit on the epoch day
+                    if value.date() in (date(1899, 12, 31), date(1904, 1, 1)):
+                        value = value.time()
+                elif kind == xlrd.XL_CELL_ERROR:
+                    value = None
+                elif kind == xlrd.XL_CELL_BOOLEAN:
+                    value = bool(value)
+                row.append(value)
+            rows.append(row)
+        return rows
+    finally:
+        workbook.release_resources()
+
+def _rows_pyxlsb(data, fmt):
+    from pyxlsb import open_workbook
+
+    with open_workbook(io.BytesIO(data)) as workbook:
+        with workbook.get_sheet(1) as sheet:
+            return [[cell.v for cell in row] for row in sheet.rows(sparse=False)]
+
+# Engine -> (module it needs, formats it reads, row reader)
+ENGINES = {
+    'calamine': ('python_calamine', ('xlsx', 'xls', 'xlsb'), _rows_calamine),
+    'openpyxl': ('openpyxl', ('xlsx',), _rows_openpyxl),
+    'xlrd': ('xlrd', ('xls',), _rows_xlrd),
+    'pyxlsb': ('pyxlsb', ('xlsb',), _rows_pyxlsb),
+}
+
+def _installed(module):
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+def available_engines(fmt=None):
+    """Installed engines, fastest first, optionally only those reading fmt"""
+    return [
+        name for name, (module, formats, _) in ENGINES.items()
+        if (fmt is None or fmt in formats) and _installed(module)
+    ]
+
+def choose_engine(fmt, engine=None):
+    engine = engine or EXCEL_ENGINE
+    if engine != 'auto':
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown Excel engine: {engine}")
+        if fmt not in ENGINES[engine][1]:
+            raise ValueError(f"The {engine} engine can't read .{fmt} workbooks")
+        return engine
+    engines = available_engines(fmt)
+    if not engines:
+        raise WorkbookError(f"No installed Excel engine reads .{fmt} workbooks")
+    return engines[0]
+
+def cell_text(value):
+    """A raw cell value as pd.read_excel(dtype=str) reports it"""
+    if value is None:
+        return NAN
+    if isinstance(value, str):
+        return NAN if value in _NA_STRINGS else value
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return NAN
+        # Whole numbers read as integers, so 10802.0 becomes '10802'
+        return str(int(value)) if value.is_integer() else str(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        # Engines that return plain dates agree with openpyxl's datetimes
+        return str(datetime.combine(value, time()))
+    return str(value)
+
+def _column_names(header):
+    """Header cells as pandas names them: 'Unnamed: i' for blanks, 'name.1' for repeats"""
+    names = []
+    for i, value in enumerate(header):
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        names.append(f'Unnamed: {i}' if value is None or value == '' else value)
+
+    counts = defaultdict(int)
+    for i, name in enumerate(names):
+        count = counts[name]
+        while count > 0:
+            counts[name] = count + 1
+            name = f'{name}.{count}'
+            count = counts[name]
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+def frame_from_rows(rows):
+    """DataFrame of string cells from raw rows, header in the first row"""
+    trimmed = []
+    last_with_data = -1
+    for i, row in enumerate(rows):
+        row = list(row)
+        # Trim trailing empty cells, then trailing empty rows, like pandas' readers
+        while row and (row[-1] is None or row[-1] == ''):
+            row.pop()
+        if row:
+            last_with_data = i
+        trimmed.append(row)
+    trimmed = trimmed[:last_with_data + 1]
+    if not trimmed:
+        return pd.DataFrame()
+
+    width = max(len(row) for row in trimmed)
+    header = trimmed[0] + [None] * (width - len(trimmed[0]))
+    body = trimmed[1:]
+    columns = {}
+    for j, name in enumerate(_column_names(header)):
+        columns[name] = pd.Series(
+            [cell_text(row[j]) if j < len(row) else NAN for row in body], dtype=object)
+    return pd.DataFrame(columns)
+
+def read_excel_frame(data, engine=None):
+    """First sheet of a workbook (bytes) as a DataFrame of raw string cells"""
+    fmt = detect_format(data)
+    name = choose_engine(fmt, engine)
+    return frame_from_rows(ENGINES[name][2](data, fmt))
@@ -0,0 +1,101 @@
+"""
+Incremental Re-parse for M&J Toys Inc.
+Fingerprints the raw rows of each Order_number group so a re-uploaded
+workbook only recomputes the orders whose rows changed. Results of the
+previous upload are cached per workbook in the blob store (and in memory on
+warm containers), and each parse reports which orders were added, changed
+or removed since then.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Bump when order processing changes so cached results are recomputed
+PARSER_VERSION = 1
+
+CACHE_PREFIX = 'parse-cache'
+
+# Workbooks kept in the in-process cache
+MEMORY_CACHE_SIZE = 16
+
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+
+def cache_key(workbook_id):
+    digest = hashlib.sha256(str(workbook_id).encode('utf-8')).hexdigest()[:32]
+    return f'{CACHE_PREFIX}/v{PARSER_VERSION}/{digest}.json.gz'
+
+def group_fingerprints(df):
+    """Order_number -> fingerprint of that order's raw rows (values and order)"""
+    order_numbers = df['Order_number'].fillna('').astype(str)
+    row_hashes = pd.util.hash_pandas_object(df.fillna(''), index=False)
+    columns = ','.join(map(str, df.columns)).encode('utf-8')
+    return {
+        order_number: hashlib.sha1(columns + hashes.to_numpy().tobytes()).hexdigest()
+        for order_number, hashes in row_hashes.groupby(order_numbers, sort=False)
+    }
+
+def load_cache(blobs, workbook_id):
+    key = cache_key(workbook_id)
+    with _memory_lock:
+        if key in _memory_cache:
+            _memory_cache.move_to_end(key)
+            return _memory_cache[key]
+    payload = blobs.get(key)
+    if not payload:
+        return None
+    cache = json.loads(gzip.decompress(payload))
+    _remember(key, cache)
+    return cache
+
+def save_cache(blobs, workbook_id, cache):
+    key = cache_key(workbook_id)
+    blobs.put(key, gzip.compress(json.dumps(cache).encode('utf-8')), content_type='application/gzip')
+    _remember(key, cache)
+
+def _remember(key, cache):
+    with _memory_lock:
+        _memory_cache[key] = cache
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+def parse_incremental(df, workbook_id, blobs, process):
+    """
+    Parse a raw workbook frame, reusing cached orders whose rows are unchanged.
+    process(frame) -> (orders, validation_report) computes the changed groups.
+    Returns (orders, validation_report, changes).
+    """
+    fingerprints = group_fingerprints(df)
+    cache = load_cache(blobs, workbook_id) or {'fingerprints': {}, 'orders': {}}
+    previous = cache['fingerprints']
+
+    reused = {
+        order_number: cache['orders'][order_number]
+        for order_number, fingerprint in fingerprints.items()
+        if previous.get(order_number) == fingerprint and order_number in cache['orders']
+    }
+    stale = ~df['Order_number'].fillna('').astype(str).isin(list(reused))
+    computed, report = process(df[stale])
+
+    orders = dict(reused)
+    for order in computed:
+        orders[order['Order_number']] = order
+
+    changes = {
+        'added': sorted(n for n in fingerprints if n not in previous),
+        'changed': sorted(n for n in fingerprints if n in previous and previous[n] != fingerprints[n]),
+        'removed': sorted(n for n in previous if n not in fingerprints),
+        'reused': len(reused),
+        'recomputed': len(computed),
+    }
+
+    if changes['added'] or changes['changed'] or changes['removed'] or len(computed):
+        save_cache(blobs, workbook_id, {'fingerprints': fingerprints, 'orders': orders})
+
+    return [orders[n] for n in sorted(orders)], report, changes
@@ -1,14 +1,10 @@
 """
 Invoice Template for M&J Toys Inc.
+Split into a settings-only shell (styles, company header, footer) and a
+per-order fragment, so a batch renders the shell once per settings version.
 """
 
-INVOICE_TEMPLATE = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Invoice {{ order.Order_number }}</title>
+INVOICE_STYLES = """
     <style>
         @page {
             size: Letter;
@@ -85,6 +81,11 @@ INVOICE_TEMPLATE = """
             margin: 5px 0;
         }
 
+        .barcode img {
+            width: 160px;
+            height: 40px;
+        }
+
         .invoice-number, .invoice-date {
             font-size: 11px;
             margin: 2px 0;
@@ -203,13 +204,17 @@ INVOICE_TEMPLATE = """
             font-size: 10px;
             margin: 5px 0;
         }
+
+        .page-break {
+            page-break-after: always;
+        }
     </style>
-</head>
-<body>
-    <div class="header">
-        <div class="header-top">
+"""
+
+# Company header block; depends on settings only
+INVOICE_COMPANY_HEADER = """
             <div class="logo-section">
-                <img src="{{ settings.logo_url }}" alt="M&J Toys Logo">
+                <img src="{{ logo_src or settings.logo_url }}" alt="M&J Toys Logo">
             </div>
             <div class="company-info">
                 <div class="company-name">{{ settings.company_name }}</div>
@@ -218,8 +223,25 @@ INVOICE_TEMPLATE = """
                 <div class="company-address">Tel: {{ settings.company_phone }}&nbsp;&nbsp;&nbsp;&nbsp;Fax:{{ settings.company_fax }}</div>
                 <div class="invoice-title">I N V O I C E</div>
             </div>
+"""
+
+# Footer block; depends on settings only
+INVOICE_FOOTER = """
+    <div class="footer">
+        {{ settings.invoice_footer or "ALL SALES ARE FINAL! Net prices included defective allowance discount. Please contact us with in 7 days to claim for missing or damage caused by the Carriers. Refused shipment will get bill for a 20% restocking fees, plus both ways freights. Payment received after 10 days from due date will be subject for a $50 fee, or 2%which ever is greater and additional periodic interest charges of up to 1.5% per month." }}
+    </div>
+"""
+
+# Per-order pages; company_header and footer are pre-rendered markup
+INVOICE_FRAGMENT = """
+    {% set pages = pages or [{'number': 1, 'line_items': order.line_items, 'is_last': True}] %}
+    {% for page in pages %}
+    <div class="page{% if not page.is_last %} page-break{% endif %}">
+    <div class="header">
+        <div class="header-top">
+            {{ company_header }}
             <div class="invoice-info">
-                <div class="barcode">*{{ order.Order_number }}*</div>
+                <div class="barcode">{% if barcode_uri %}<img src="{{ barcode_uri }}" alt="*{{ order.Order_number }}*">{% else %}*{{ order.Order_number }}*{% endif %}</div>
                 <div class="invoice-number">Invoice No.: {{ order.Order_number }}</div>
                 <div class="invoice-date">Date: {{ order.Invoice_Date }}</div>
             </div>
@@ -229,7 +251,7 @@ INVOICE_TEMPLATE = """
     <div class="meta-info">
         <strong>Customer ID:</strong> {{ order.Customer_ID }}&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;
         <strong>Ship Date:</strong> {{ order.Ship_Date }}&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;&nbsp;
-        <strong>Page:</strong> 1
+        <strong>Page:</strong> {{ page.number }} of {{ pages|length }}
     </div>
 
     <div class="customer-info-row">
@@ -296,7 +318,7 @@ INVOICE_TEMPLATE = """
             </tr>
         </thead>
         <tbody>
-            {% for item in order.line_items %}
+            {% for item in page.line_items %}
             <tr>
                 <td class="center">{{ item.line_number }}</td>
                 <td class="right">{{ item.Order_Unit }}</td>
@@ -313,6 +335,7 @@ INVOICE_TEMPLATE = """
         </tbody>
     </table>
 
+    {% if page.is_last %}
     <div class="totals-section">
         <div class="totals-left">
             <strong>Total BX:</strong>&nbsp;&nbsp;&nbsp;
@@ -356,9 +379,22 @@ INVOICE_TEMPLATE = """
         </div>
     </div>
 
-    <div class="footer">
-        {{ settings.invoice_footer or "ALL SALES ARE FINAL! Net prices included defective allowance discount. Please contact us with in 7 days to claim for missing or damage caused by the Carriers. Refused shipment will get bill for a 20% restocking fees, plus both ways freights. Payment received after 10 days from due date will be subject for a $50 fee, or 2%which ever is greater and additional periodic interest charges of up to 1.5% per month." }}
+    {{ footer }}
+    {% endif %}
     </div>
-</body>
+    {% endfor %}
+"""
+
+# Complete single-document template
+INVOICE_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Invoice {{ order.Order_number }}</title>""" + INVOICE_STYLES + """</head>
+<body>
+    {% set company_header %}""" + INVOICE_COMPANY_HEADER + """    {% endset %}
+    {% set footer %}""" + INVOICE_FOOTER + """    {% endset %}""" + INVOICE_FRAGMENT + """</body>
 </html>
 """
@@ -5,23 +5,23 @@ Simplified Lambda Function - PDF generation moved to client-side
 
 import json
 import base64
-import io
+import hashlib
+import time
 from datetime import datetime
 from decimal import Decimal
-import boto3
 import pandas as pd
 import traceback
 
-# Initialize AWS services
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-s3_client = boto3.client('s3', region_name='us-east-1')
+from storage import get_storage, S3_BUCKET
+from search_index import index_entries, search_documents
+from sales_aggregates import record_document, read_report
+from validation import validate_frame, WorkbookError
+from excel_readers import read_excel_frame
+from rendered_pdfs import schedule_render, render_saved_document, stored_pdf, renderable, render_failed
+import metrics
 
-# Table references
-settings_table = dynamodb.Table('MJToys_Settings')
-documents_table = dynamodb.Table('MJToys_Documents')
-
-# S3 bucket
-S3_BUCKET = 'prompt-images-nerd'
+# Settings, documents and blobs (DynamoDB/S3, SQLite or in-memory; see storage.py)
+storage = get_storage()
 
 class DecimalEncoder(json.JSONEncoder):
     """Helper class to convert Decimal to float for JSON serialization"""
@@ -30,49 +30,102 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
-def cors_response(status_code, body):
+# Cache-Control policy per cacheable GET route
+CACHE_POLICIES = {
+    '/get-settings': 'private, no-cache',
+    '/get-history': 'private, no-cache',
+    '/get-document': 'private, max-age=300, must-revalidate',
+}
+
+def cors_response(status_code, body, headers=None):
     """Return response with proper CORS headers"""
+    response_headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Requested-With, If-None-Match',
+        'Access-Control-Expose-Headers': 'ETag',
+        'Access-Control-Max-Age': '86400'
+    }
+    if headers:
+        response_headers.update(headers)
     return {
         'statusCode': status_code,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Requested-With',
-            'Access-Control-Max-Age': '86400'
-        },
-        'body': json.dumps(body, cls=DecimalEncoder)
+        'headers': response_headers,
+        'body': '' if body is None else json.dumps(body, cls=DecimalEncoder)
     }
 
-def parse_excel_file(file_content):
-    """Parse Excel file and extract order data"""
-    try:
-        # Decode base64 content
-        excel_bytes = base64.b64decode(file_content)
-
-        # Read Excel file
-        df = pd.read_excel(io.BytesIO(excel_bytes), dtype=str)
+def etag_matches(event, etag):
+    """Check the request's If-None-Match header against an ETag"""
+    headers = event.get('headers') or {}
+    if_none_match = headers.get('if-none-match') or headers.get('If-None-Match')
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or any(tag.removeprefix('W/') == etag for tag in candidates)
+
+def conditional_response(event, body, version=None):
+    """
+    200 with an ETag and the route's Cache-Control policy, or an empty 304
+    when the client already has this version. The ETag comes from a version
+    attribute when given, otherwise from a hash of the serialized body.
+    """
+    payload = json.dumps(body, cls=DecimalEncoder, sort_keys=True)
+    tag = version or hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+    etag = f'"{tag}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': CACHE_POLICIES.get(event.get('rawPath', '/'), 'private, no-cache'),
+    }
 
-        # Convert date columns
-        date_columns = ['Invoice_Date', 'SO_Date', 'Date_Paid', 'Ship_Date']
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%m/%d/%Y')
+    if etag_matches(event, etag):
+        response = cors_response(304, None, headers)
+        del response['headers']['Content-Type']
+        return response
 
-        # Group by order number
-        grouped = df.groupby('Order_number')
+    response = cors_response(200, None, headers)
+    response['body'] = payload
+    return response
 
-        orders = []
-        for order_number, group in grouped:
-            order_data = process_order_group(group, order_number)
-            orders.append(order_data)
+def parse_excel_file(file_content):
+    """Parse Excel file and extract order data"""
+    orders, _ = parse_excel_with_report(file_content)
+    return orders
 
-        return orders
+def parse_excel_with_report(file_content):
+    """Parse Excel file; returns the valid orders and the validation report"""
+    try:
+        return orders_from_frame(read_workbook(file_content))
+    except WorkbookError:
+        raise
     except Exception as e:
         print(f"Error parsing Excel: {str(e)}")
         traceback.print_exc()
         raise e
 
+def read_workbook(file_content):
+    """Decode a base64 workbook into a DataFrame of raw string cells"""
+    excel_bytes = base64.b64decode(file_content)
+    return read_excel_frame(excel_bytes)
+
+def orders_from_frame(df):
+    """Validate raw workbook rows and build one order per Order_number"""
+    # Check every row up front; converts numbers and dates, drops invalid orders
+    df, report = validate_frame(df)
+    if report['error_count']:
+        print(f"Validation: {report['error_count']} errors, "
+              f"{len(report['invalid_orders'])} orders excluded")
+
+    # Group by order number
+    grouped = df.groupby('Order_number')
+
+    orders = []
+    for order_number, group in grouped:
+        order_data = process_order_group(group, order_number)
+        orders.append(order_data)
+
+    return orders, report
+
 def process_order_group(group, order_number):
     """Process a group of rows for a single order"""
     # Calculate totals
@@ -110,7 +163,7 @@ def process_order_group(group, order_number):
         'Country_Code': first_row.get('Country_Code', ''),
         'Phone': first_row.get('Phone', ''),
         'Fax': first_row.get('Fax', ''),
-        'Discount': float(first_row.get('Discount', 0)),
+        'Discount': float(first_row.get('Discount', 0)) if pd.notna(first_row.get('Discount')) else 0.0,
         'Shipping_Handling': float(first_row.get('Shipping_Handling', 0)) if pd.notna(first_row.get('Shipping_Handling')) else 0.0,
     }
 
@@ -170,11 +223,11 @@ def process_order_group(group, order_number):
     return order_details
 
 def get_settings():
-    """Get company settings from DynamoDB"""
+    """Get company settings from storage"""
     try:
-        response = settings_table.get_item(Key={'setting_key': 'company_settings'})
-        if 'Item' in response:
-            return response['Item']
+        item = storage.settings.get('company_settings')
+        if item:
+            return item
         else:
             # Return defaults if not found
             return {
@@ -190,47 +243,78 @@ def get_settings():
         print(f"Error getting settings: {e}")
         return {}
 
-def lambda_handler(event, context):
-    """Main Lambda handler with CORS support"""
+def new_settings_version():
+    """Version stamp stored with settings; changes on every settings write"""
+    import uuid
+    return uuid.uuid4().hex
+
+def handle_health(event):
+    """Health check with codec stats and this process's per-route latency percentiles"""
+    from document_codec import codec_stats
+    return cors_response(200, {
+        'status': 'healthy',
+        'message': 'M&J Toys API is running (client-side PDF generation)',
+        'version': '2.0',
+        'document_codec': codec_stats(),
+        'metrics': metrics.summary()
+    })
 
+def lambda_handler(event, context):
+    """Main Lambda handler with CORS support; records latency and sizes per route"""
+    http_method = event.get('requestContext', {}).get('http', {}).get('method', 'POST')
+    path = event.get('rawPath', '/')
+    if event.get('job'):
+        route = f"job {event['job']}"
+    elif http_method == 'OPTIONS':
+        route = 'OPTIONS'
+    elif (http_method, path) in ROUTES:
+        route = f'{http_method} {path}'
+    else:
+        # Keep unknown paths out of the metric dimensions
+        route = 'unmatched'
+
+    started = time.perf_counter()
+    token = metrics.begin_request(route)
+    response = handle_request(event, http_method, path)
+    # Jobs return plain results
+    status = response.get('statusCode', 200) if isinstance(response, dict) else 200
+    response_bytes = len(response.get('body') or '') if isinstance(response, dict) else 0
+    metrics.end_request(token, route, started, len(event.get('body') or ''), response_bytes, status)
+    return response
+
+def handle_request(event, http_method, path):
     try:
-        # Parse the request
-        http_method = event.get('requestContext', {}).get('http', {}).get('method', 'POST')
-        path = event.get('rawPath', '/')
+        # Scheduled jobs (EventBridge) carry a job name instead of an HTTP request
+        if event.get('job'):
+            return run_job(event)
 
         # Handle OPTIONS preflight requests for CORS
         if http_method == 'OPTIONS':
             return cors_response(200, {'message': 'CORS preflight successful'})
 
-        # Handle different routes
-        if path == '/parse-excel' and http_method == 'POST':
-            return handle_parse_excel(event)
-        elif path == '/get-settings' and http_method == 'GET':
-            return handle_get_settings(event)
-        elif path == '/update-settings' and http_method == 'POST':
-            return handle_update_settings(event)
-        elif path == '/upload-logo' and http_method == 'POST':
-            return handle_upload_logo(event)
-        elif path == '/get-history' and http_method == 'GET':
-            return handle_get_history(event)
-        elif path == '/get-document' and http_method == 'GET':
-            return handle_get_document(event)
-        elif path == '/save-document' and http_method == 'POST':
-            return handle_save_document(event)
-        elif path == '/health' and http_method == 'GET':
-            return cors_response(200, {
-                'status': 'healthy',
-                'message': 'M&J Toys API is running (client-side PDF generation)',
-                'version': '2.0'
-            })
-        else:
+        handler = ROUTES.get((http_method, path))
+        if handler is None:
             return cors_response(404, {'error': 'Endpoint not found'})
+        return handler(event)
 
     except Exception as e:
         print(f"Error in lambda_handler: {str(e)}")
         traceback.print_exc()
         return cors_response(500, {'error': str(e), 'traceback': traceback.format_exc()})
 
+def run_job(event):
+    """Run a background job, e.g. {"job": "archive-documents", "older_than_days": 365}"""
+    job = event['job']
+    if job == 'archive-documents':
+        from archive import archive_documents, ARCHIVE_AGE_DAYS
+        result = archive_documents(storage, int(event.get('older_than_days', ARCHIVE_AGE_DAYS)),
+                                   dry_run=bool(event.get('dry_run')))
+        print(f"Job {job}: {result}")
+        return result
+    if job == 'render-pdf':
+        return {'key': render_saved_document(storage, event['document_id'], get_settings)}
+    raise ValueError(f"Unknown job: {job}")
+
 def handle_parse_excel(event):
     """Handle Excel file parsing"""
     try:
@@ -240,8 +324,38 @@ def handle_parse_excel(event):
         if not file_content:
             return cors_response(400, {'error': 'No file content provided'})
 
-        orders = parse_excel_file(file_content)
-        return cors_response(200, {'orders': orders})
+        # Exports from the API only go to the bucket, never to the server's filesystem
+        export_options = body.get('export')
+        destination = (export_options or {}).get('destination')
+        if destination and not str(destination).startswith('s3://'):
+            return cors_response(400, {'error': 'export.destination must be an s3:// prefix'})
+
+        # Incremental mode: reuse orders from the last upload of the same workbook
+        workbook_id = body.get('workbook_id')
+        if body.get('incremental') and workbook_id:
+            from incremental_parse import parse_incremental
+            orders, report, changes = parse_incremental(
+                read_workbook(file_content), workbook_id, storage.blobs, orders_from_frame)
+            response_body = {'orders': orders, 'validation': report, 'changes': changes}
+        else:
+            orders, report = parse_excel_with_report(file_content)
+            response_body = {'orders': orders, 'validation': report}
+        metrics.record_count('Rows', report['rows_checked'])
+        metrics.record_count('Orders', len(orders))
+
+        # Optional columnar export for analytics: {"format": "parquet", "destination": "s3://..."}
+        if export_options:
+            from columnar_export import export_orders, default_export_prefix
+            response_body['export'] = export_orders(
+                orders,
+                export_options.get('destination') or default_export_prefix(S3_BUCKET),
+                fmt=export_options.get('format', 'parquet'),
+                blobs=storage.blobs
+            )
+
+        return cors_response(200, response_body)
+    except WorkbookError as e:
+        return cors_response(400, {'error': str(e)})
     except Exception as e:
         return cors_response(500, {'error': str(e)})
 
@@ -249,7 +363,7 @@ def handle_get_settings(event):
     """Get company settings"""
     try:
         settings = get_settings()
-        return cors_response(200, {'settings': settings})
+        return conditional_response(event, {'settings': settings}, settings.get('settings_version'))
     except Exception as e:
         return cors_response(500, {'error': str(e)})
 
@@ -260,7 +374,8 @@ def handle_update_settings(event):
         settings = body.get('settings', {})
 
         settings['setting_key'] = 'company_settings'
-        settings_table.put_item(Item=settings)
+        settings['settings_version'] = new_settings_version()
+        storage.settings.put(settings)
 
         return cors_response(200, {'message': 'Settings updated successfully'})
     except Exception as e:
@@ -279,59 +394,26 @@ def handle_upload_logo(event):
         # Decode base64
         logo_bytes = base64.b64decode(logo_content)
 
-        # Determine content type from filename
-        content_type = 'image/png'
-        if filename.lower().endswith('.jpg') or filename.lower().endswith('.jpeg'):
-            content_type = 'image/jpeg'
-        elif filename.lower().endswith('.gif'):
-            content_type = 'image/gif'
-        elif filename.lower().endswith('.svg'):
-            content_type = 'image/svg+xml'
-
-        # Generate unique filename with timestamp to avoid caching issues
-        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-        file_extension = filename.split('.')[-1] if '.' in filename else 'png'
-        unique_filename = f'logo_{timestamp}.{file_extension}'
-        key = f'logos/{unique_filename}'
-
-        # Upload to S3 (without ACL - bucket policy should handle public access)
-        try:
-            s3_client.put_object(
-                Bucket=S3_BUCKET,
-                Key=key,
-                Body=logo_bytes,
-                ContentType=content_type,
-                CacheControl='no-cache, no-store, must-revalidate'
-            )
-            print(f"Successfully uploaded logo to s3://{S3_BUCKET}/{key}")
-        except Exception as s3_error:
-            print(f"S3 upload error: {str(s3_error)}")
-            # Try with public-read ACL as fallback
-            try:
-                s3_client.put_object(
-                    Bucket=S3_BUCKET,
-                    Key=key,
-                    Body=logo_bytes,
-                    ContentType=content_type,
-                    CacheControl='no-cache, no-store, must-revalidate',
-                    ACL='public-read'
-                )
-                print(f"Successfully uploaded logo with public-read ACL")
-            except Exception as acl_error:
-                print(f"S3 upload with ACL also failed: {str(acl_error)}")
-                raise s3_error
-
-        # Get URL
-        logo_url = f'https://{S3_BUCKET}.s3.us-east-1.amazonaws.com/{key}'
+        # Content-addressed upload: identical logos are stored once, with variants
+        from logo_assets import upload_logo
+        result = upload_logo(storage.blobs, logo_bytes, filename)
+        logo_url = result['logo_url']
 
         # Update settings
         settings = get_settings()
         settings['logo_url'] = logo_url
+        settings['logo_variants'] = result['logo_variants']
         settings['setting_key'] = 'company_settings'
-        settings_table.put_item(Item=settings)
+        settings['settings_version'] = new_settings_version()
+        storage.settings.put(settings)
 
         print(f"Logo URL updated in settings: {logo_url}")
-        return cors_response(200, {'logo_url': logo_url, 'message': 'Logo uploaded successfully'})
+        return cors_response(200, {
+            'logo_url': logo_url,
+            'logo_variants': result['logo_variants'],
+            'uploaded': result['uploaded'],
+            'message': 'Logo uploaded successfully'
+        })
     except Exception as e:
         print(f"Error uploading logo: {str(e)}")
         traceback.print_exc()
@@ -341,13 +423,12 @@ def handle_get_history(event):
     """Get document history"""
     try:
         # Scan the documents table (in production, consider using GSI with pagination)
-        response = documents_table.scan()
-        documents = response.get('Items', [])
+        documents = storage.documents.scan()
 
         # Sort by created_at descending
         documents.sort(key=lambda x: x.get('created_at', ''), reverse=True)
 
-        return cors_response(200, {'documents': documents})
+        return conditional_response(event, {'documents': documents})
     except Exception as e:
         print(f"Error getting history: {str(e)}")
         traceback.print_exc()
@@ -363,21 +444,106 @@ def handle_get_document(event):
         if not document_id:
             return cors_response(400, {'error': 'document_id parameter required'})
 
-        response = documents_table.get_item(Key={'document_id': document_id})
+        document = storage.documents.get(document_id)
 
-        if 'Item' not in response:
+        if not document:
             return cors_response(404, {'error': 'Document not found'})
 
-        return cors_response(200, {'document': response['Item']})
+        # Archived documents leave a stub; read the full document from the archive tier
+        if document.get('archive_key'):
+            from archive import read_archived
+            document = read_archived(storage.blobs, document)
+
+        # Presigned URL of the PDF rendered at save time; render it now if it's missing
+        settings = get_settings()
+        now = time.time()
+        pdf_url, url_window = stored_pdf(storage, document, settings, now)
+        if pdf_url is None and renderable(document) and not render_failed(storage, document, settings, now):
+            schedule_render(storage, document_id, get_settings)
+
+        # The URL changes on every call, so version the response by content and URL window
+        content = json.dumps(document, cls=DecimalEncoder, sort_keys=True)
+        version = f"{hashlib.sha256(content.encode('utf-8')).hexdigest()[:24]}-{url_window or 'pending'}"
+        return conditional_response(event, {'document': document, 'pdf_url': pdf_url}, version)
     except Exception as e:
         print(f"Error getting document: {str(e)}")
         traceback.print_exc()
         return cors_response(500, {'error': str(e)})
 
+# Most IDs one /get-documents request may ask for
+MAX_BATCH_DOCUMENTS = 500
+
+def handle_get_documents(event):
+    """Get many documents by ID in one request (BatchGetItem in chunks of 100)"""
+    try:
+        body = json.loads(event.get('body') or '{}')
+        document_ids = body.get('document_ids') or []
+
+        if not isinstance(document_ids, list) or not document_ids:
+            return cors_response(400, {'error': 'document_ids list required'})
+        document_ids = list(dict.fromkeys(str(d) for d in document_ids))
+        if len(document_ids) > MAX_BATCH_DOCUMENTS:
+            return cors_response(400, {'error': f'At most {MAX_BATCH_DOCUMENTS} document_ids per request'})
+
+        documents = storage.documents.get_many(document_ids)
+
+        # Archived documents leave a stub; read them from the archive tier, one file at a time
+        stubs = [document for document in documents.values() if document.get('archive_key')]
+        if stubs:
+            from archive import read_archived_many
+            documents.update(read_archived_many(storage.blobs, stubs))
+
+        response_body = {
+            'documents': documents,
+            'missing': [d for d in document_ids if d not in documents],
+        }
+
+        # Presigned URLs of already-rendered PDFs, on request (one existence check per document)
+        if body.get('include_pdf_urls'):
+            from concurrent.futures import ThreadPoolExecutor
+            settings = get_settings()
+            now = time.time()
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                urls = executor.map(lambda document: stored_pdf(storage, document, settings, now)[0],
+                                    documents.values())
+                response_body['pdf_urls'] = dict(zip(documents, urls))
+
+        metrics.record_count('Documents', len(documents))
+        return cors_response(200, response_body)
+    except Exception as e:
+        print(f"Error getting documents: {str(e)}")
+        traceback.print_exc()
+        return cors_response(500, {'error': str(e)})
+
+def handle_search_documents(event):
+    """Search saved documents through the index (no table scan)"""
+    try:
+        params = event.get('queryStringParameters') or {}
+        result = search_documents(storage.index, params)
+        return cors_response(200, result)
+    except ValueError as e:
+        return cors_response(400, {'error': str(e)})
+    except Exception as e:
+        print(f"Error searching documents: {str(e)}")
+        traceback.print_exc()
+        return cors_response(500, {'error': str(e)})
+
+def handle_reports(event):
+    """Sales totals by customer, sales rep or day from pre-aggregated counters"""
+    try:
+        params = event.get('queryStringParameters') or {}
+        return cors_response(200, read_report(storage.aggregates, params))
+    except ValueError as e:
+        return cors_response(400, {'error': str(e)})
+    except Exception as e:
+        print(f"Error reading report: {str(e)}")
+        traceback.print_exc()
+        return cors_response(500, {'error': str(e)})
+
 def handle_save_document(event):
-    """Save a document to history"""
+    """Save a document to history; identical re-saves are no-ops, changes add a version"""
     try:
-        import uuid
+        from document_versions import save_document
 
         body = json.loads(event.get('body', '{}'))
         document_data = body.get('document', {})
@@ -385,22 +551,162 @@ def handle_save_document(event):
         if not document_data:
             return cors_response(400, {'error': 'No document data provided'})
 
-        # Generate document ID if not provided
-        if 'document_id' not in document_data:
-            document_data['document_id'] = str(uuid.uuid4())
-
         # Add timestamp if not provided
         if 'created_at' not in document_data:
             document_data['created_at'] = datetime.utcnow().isoformat()
 
-        # Save to DynamoDB
-        documents_table.put_item(Item=document_data)
+        if 'document_id' in document_data:
+            # Caller-managed ID: plain overwrite, as before
+            previous = storage.documents.get(document_data['document_id'])
+            if previous and previous.get('archive_key'):
+                from archive import read_archived
+                previous = read_archived(storage.blobs, previous)
+            storage.documents.put(document_data)
+            created = True
+        else:
+            document_data, created, previous = save_document(storage, document_data)
+
+        # Keep the search index and sales counters in step with new versions only
+        if created:
+            storage.index.put_entries(index_entries(document_data))
+            if previous is not None:
+                record_document(storage.aggregates, previous, sign=-1)
+            record_document(storage.aggregates, document_data)
+            # Pre-render the PDF off the request path
+            if renderable(document_data):
+                schedule_render(storage, document_data['document_id'], get_settings)
 
         return cors_response(200, {
-            'message': 'Document saved successfully',
-            'document_id': document_data['document_id']
+            'message': 'Document saved successfully' if created else 'Document already saved',
+            'document_id': document_data['document_id'],
+            'created': created,
+            'version': document_data.get('version'),
+            'previous_version_id': document_data.get('previous_version_id')
         })
     except Exception as e:
         print(f"Error saving document: {str(e)}")
         traceback.print_exc()
         return cors_response(500, {'error': str(e)})
+
+def handle_render_html(event):
+    """Render an invoice or packing slip preview as HTML (memoized per settings version)"""
+    try:
+        from document_renderer import render_document_html_cached, render_batch_html
+
+        body = json.loads(event.get('body') or '{}')
+        document_type = body.get('document_type', 'invoice')
+
+        # Batch: one HTML document with the shared header, styles and footer rendered once
+        if body.get('orders'):
+            html = render_batch_html(document_type, body['orders'], get_settings())
+            return cors_response(200, {'html': html, 'document_count': len(body['orders'])})
+
+        order = body.get('order')
+        if not order:
+            return cors_response(400, {'error': 'No order provided'})
+
+        html, cache_hit = render_document_html_cached(document_type, order, get_settings())
+
+        return cors_response(200, {'html': html, 'cache': 'hit' if cache_hit else 'miss'})
+    except ValueError as e:
+        return cors_response(400, {'error': str(e)})
+    except Exception as e:
+        print(f"Error rendering HTML: {str(e)}")
+        traceback.print_exc()
+        return cors_response(500, {'error': str(e)})
+
+def handle_export_documents(event):
+    """Export saved documents (one row per line item) and return a download URL"""
+    try:
+        from document_export import export_documents, DEFAULT_SEGMENTS, DEFAULT_MAX_READ_UNITS
+
+        body = json.loads(event.get('body') or '{}')
+        result = export_documents(
+            storage,
+            fmt=body.get('format', 'csv'),
+            document_type=body.get('document_type', 'invoice') or None,
+            month=body.get('month'),
+            segments=int(body.get('segments', DEFAULT_SEGMENTS)),
+            max_read_units=float(body.get('max_read_units', DEFAULT_MAX_READ_UNITS)),
+            all_versions=bool(body.get('all_versions'))
+        )
+
+        return cors_response(200, {
+            'download_url': storage.blobs.presigned_url(result['key'], expires_in=3600),
+            'key': result['key'],
+            'rows': result['rows'],
+            'message': 'Export generated successfully'
+        })
+    except ValueError as e:
+        return cors_response(400, {'error': str(e)})
+    except Exception as e:
+        print(f"Error exporting documents: {str(e)}")
+        traceback.print_exc()
+        return cors_response(500, {'error': str(e)})
+
+def handle_generate_bundle(event):
+    """Render all documents of an upload into a zip (or one PDF) and return a download URL"""
+    try:
+        import uuid
+        from bundle import write_bundle, BUNDLE_FORMATS, DOCUMENT_TYPES
+
+        body = json.loads(event.get('body', '{}'))
+        orders = body.get('orders')
+        if not orders and body.get('file_content'):
+            orders = parse_excel_file(body['file_content'])
+
+        if not orders:
+            return cors_response(400, {'error': 'No orders or file content provided'})
+
+        fmt = body.get('format', 'zip')
+        if fmt not in BUNDLE_FORMATS:
+            return cors_response(400, {'error': f'Unsupported bundle format: {fmt}'})
+
+        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        key = f'bundles/{timestamp}_{uuid.uuid4().hex[:8]}.{fmt}'
+
+        with storage.blobs.open_writer(key, content_type=BUNDLE_FORMATS[fmt]) as stream:
+            count = write_bundle(
+                stream,
+                orders,
+                get_settings(),
+                fmt=fmt,
+                sort_by=body.get('sort_by', 'Order_number'),
+                document_types=body.get('document_types') or DOCUMENT_TYPES,
+                collate=body.get('collate', 'order'),
+                max_workers=int(body.get('max_workers', 4))
+            )
+
+        download_url = storage.blobs.presigned_url(key, expires_in=3600)
+        metrics.record_count('Documents', count)
+
+        return cors_response(200, {
+            'download_url': download_url,
+            'key': key,
+            'document_count': count,
+            'message': 'Bundle generated successfully'
+        })
+    except ValueError as e:
+        return cors_response(400, {'error': str(e)})
+    except Exception as e:
+        print(f"Error generating bundle: {str(e)}")
+        traceback.print_exc()
+        return cors_response(500, {'error': str(e)})
+
+# (method, path) -> handler
+ROUTES = {
+    ('POST', '/parse-excel'): handle_parse_excel,
+    ('GET', '/get-settings'): handle_get_settings,
+    ('POST', '/update-settings'): handle_update_settings,
+    ('POST', '/upload-logo'): handle_upload_logo,
+    ('GET', '/get-history'): handle_get_history,
+    ('GET', '/get-document'): handle_get_document,
+    ('POST', '/get-documents'): handle_get_documents,
+    ('POST', '/save-document'): handle_save_document,
+    ('GET', '/search-documents'): handle_search_documents,
+    ('GET', '/reports'): handle_reports,
+    ('POST', '/render-html'): handle_render_html,
+    ('POST', '/generate-bundle'): handle_generate_bundle,
+    ('POST', '/export-documents'): handle_export_documents,
+    ('GET', '/health'): handle_health,
+}
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Local load test for M&J Toys Inc.
+Generates function URL events for each API route (parse-excel with synthetic
+workbooks, save-document, history, settings, ...) and drives lambda_handler
+from concurrent threads against the in-memory or SQLite storage backend.
+Reports throughput, latency percentiles and memory per route.
+
+Memory is measured with tracemalloc (peak and retained Python allocations per
+route, which slows requests down) plus the process's peak RSS; pass
+--no-tracemalloc for latency-only runs.
+
+Usage:
+    python load_test.py --concurrency 8 --duration 10 --orders 200
+    python load_test.py --storage sqlite --routes parse-excel save-document --no-tracemalloc
+"""
+
+import argparse
+import base64
+import copy
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+from benchmark_server import percentile
+
+ROUTE_NAMES = [
+    'parse-excel', 'save-document', 'get-history', 'get-document', 'search-documents',
+    'reports', 'render-html', 'get-settings', 'update-settings', 'health',
+]
+
+def function_url_event(method, path, body=None, query=None):
+    """A Lambda function URL (payload v2.0) event"""
+    event = {
+        'version': '2.0',
+        'rawPath': path,
+        'rawQueryString': '&'.join(f'{k}={v}' for k, v in (query or {}).items()),
+        'headers': {'content-type': 'application/json', 'user-agent': 'mjtoys-load-test'},
+        'requestContext': {'http': {'method': method, 'path': path, 'sourceIp': '127.0.0.1'}},
+        'isBase64Encoded': False,
+    }
+    if query:
+        event['queryStringParameters'] = dict(query)
+    if body is not None:
+        event['body'] = json.dumps(body)
+    return event
+
+class Scenario:
+    """Event factories for every route, sharing the synthetic orders and saved document IDs"""
+
+    def __init__(self, workbooks, orders, settings, seed=0):
+        self.workbooks = [base64.b64encode(data).decode('ascii') for data in workbooks]
+        self.orders = orders
+        self.settings = settings
+        self.document_ids = []
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+
+    def _choice(self, values):
+        with self.lock:
+            return self.rng.choice(values)
+
+    def document_body(self):
+        order = self._choice(self.orders)
+        # One save in five changes a price, so saves mix new versions and no-op re-saves
+        if self._choice(range(5)) == 0:
+            order = copy.deepcopy(order)
+            item = self._choice(order['line_items'])
+            item['Net_Price'] = round(item['Net_Price'] + 0.5, 2)
+        return {'document': {
+            'document_type': self._choice(['invoice', 'packing_slip']),
+            'order_number': order['Order_number'],
+            'customer_name': order['Recipient_Company'],
+            'order_data': order,
+        }}
+
+    def event(self, name):
+        if name == 'parse-excel':
+            return function_url_event('POST', '/parse-excel', {'file_content': self._choice(self.workbooks)})
+        if name == 'save-document':
+            return function_url_event('POST', '/save-document', self.document_body())
+        if name == 'get-history':
+            return function_url_event('GET', '/get-history')
+        if name == 'get-document':
+            return function_url_event('GET', '/get-document', query={'document_id': self._choice(self.document_ids)})
+        if name == 'search-documents':
+            order = self._choice(self.orders)
+            field, value = self._choice([('order_number', order['Order_number']),
+                                         ('customer_id', order['Customer_ID']),
+                                         ('company', order['Recipient_Company'])])
+            return function_url_event('GET', '/search-documents', query={field: value})
+        if name == 'reports':
+            return function_url_event('GET', '/reports', query={'dimension': 'total'})
+        if name == 'render-html':
+            order = self._choice(self.orders)
+            return function_url_event('POST', '/render-html', {'order': order, 'document_type': 'invoice'})
+        if name == 'get-settings':
+            return function_url_event('GET', '/get-settings')
+        if name == 'update-settings':
+            return function_url_event('POST', '/update-settings', {'settings': dict(self.settings)})
+        if name == 'health':
+            return function_url_event('GET', '/health')
+        raise ValueError(f"Unknown route: {name}")
+
+def seed_storage(handler, scenario, documents):
+    """Save settings and some documents so the read routes have data"""
+    handler(scenario.event('update-settings'), None)
+    for _ in range(documents):
+        response = handler(scenario.event('save-document'), None)
+        document_id = json.loads(response['body']).get('document_id')
+        if document_id and document_id not in scenario.document_ids:
+            scenario.document_ids.append(document_id)
+
+def worker(handler, scenario, name, deadline, results, lock):
+    latencies = []
+    errors = 0
+    while time.perf_counter() < deadline:
+        event = scenario.event(name)
+        start = time.perf_counter()
+        try:
+            response = handler(event, None)
+            failed = response.get('statusCode', 200) >= 400
+        except Exception:
+            failed = True
+        latencies.append((time.perf_counter() - start) * 1000)
+        errors += failed
+    with lock:
+        results['latencies'].extend(latencies)
+        results['errors'] += errors
+
+def run_route(handler, scenario, name, concurrency, duration, trace_memory):
+    # Warm-up request outside the measurement
+    handler(scenario.event(name), None)
+
+    results = {'latencies': [], 'errors': 0}
+    lock = threading.Lock()
+    if trace_memory:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    deadline = started + duration
+    threads = [
+        threading.Thread(target=worker, args=(handler, scenario, name, deadline, results, lock))
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results['elapsed'] = time.perf_counter() - started
+
+    if trace_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        results['peak_mib'] = (peak - before) / 2 ** 20
+        results['retained_mib'] = (current - before) / 2 ** 20
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    results['max_rss_mib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+    return results
+
+def print_report(report):
+    print(f"{'route':<18}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'max ms':>9}{'peak MiB':>10}{'kept MiB':>10}{'RSS MiB':>9}")
+    for name, result in report.items():
+        latencies = sorted(result['latencies'])
+        print(f"{name:<18}{len(latencies):>9}{result['errors']:>8}"
+              f"{len(latencies) / result['elapsed']:>9.1f}"
+              f"{percentile(latencies, 50):>9.1f}{percentile(latencies, 95):>9.1f}"
+              f"{percentile(latencies, 99):>9.1f}{(latencies[-1] if latencies else 0):>9.1f}"
+              f"{result.get('peak_mib', 0):>10.1f}{result.get('retained_mib', 0):>10.1f}"
+              f"{result['max_rss_mib']:>9.0f}")
+
+def summarize(report):
+    """JSON-friendly report without the raw latencies"""
+    summary = {}
+    for name, result in report.items():
+        latencies = sorted(result['latencies'])
+        summary[name] = {
+            'requests': len(latencies),
+            'errors': result['errors'],
+            'throughput': round(len(latencies) / result['elapsed'], 2),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'peak_mib': round(result.get('peak_mib', 0), 2),
+            'retained_mib': round(result.get('retained_mib', 0), 2),
+            'max_rss_mib': round(result['max_rss_mib'], 1),
+        }
+    return summary
+
+def main(args):
+    # Storage and metrics are configured from the environment at import time
+    os.environ['MJTOYS_STORAGE'] = args.storage
+    os.environ.setdefault('MJTOYS_METRICS', 'off')
+    os.environ.setdefault('MJTOYS_PRERENDER', '0')
+
+    if args.trace_memory:
+        tracemalloc.start()
+
+    from excel_readers import read_excel_frame
+    from lambda_function import lambda_handler, orders_from_frame, get_settings
+    from synthetic_workbooks import synthetic_workbook
+
+    workbooks = [synthetic_workbook(args.orders, seed=seed, start_order=10000 + seed * args.orders)
+                 for seed in range(args.workbooks)]
+    orders = []
+    for data in workbooks:
+        orders.extend(orders_from_frame(read_excel_frame(data))[0])
+
+    settings = {k: v for k, v in get_settings().items() if k not in ('setting_key', 'settings_version')}
+    if args.logo_url is not None:
+        settings['logo_url'] = args.logo_url
+    scenario = Scenario(workbooks, orders, settings)
+
+    print(f"Seeding {args.storage} storage with {args.seed_documents} documents "
+          f"({len(orders)} synthetic orders, {args.workbooks} workbooks of {args.orders} orders)")
+    seed_storage(lambda_handler, scenario, args.seed_documents)
+
+    report = {}
+    for name in args.routes or ROUTE_NAMES:
+        print(f"Running {name} with {args.concurrency} threads for {args.duration}s")
+        report[name] = run_route(lambda_handler, scenario, name, args.concurrency, args.duration, args.trace_memory)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summarize(report), f, indent=2)
+    return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test lambda_handler locally')
+    parser.add_argument('--storage', choices=['memory', 'sqlite'], default='memory')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per route')
+    parser.add_argument('--orders', type=int, default=200, help='orders per synthetic workbook')
+    parser.add_argument('--workbooks', type=int, default=3, help='distinct synthetic workbooks')
+    parser.add_argument('--seed-documents', type=int, default=500, help='documents saved before the run')
+    parser.add_argument('--routes', nargs='*', choices=ROUTE_NAMES, help='only run these routes')
+    parser.add_argument('--logo-url', help="override the settings' logo URL ('' for none)")
+    parser.add_argument('--no-tracemalloc', dest='trace_memory', action='store_false',
+                        help='skip per-route allocation tracking')
+    parser.add_argument('--json', help='also write the summary to this JSON file')
+    main(parser.parse_args())
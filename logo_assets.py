@@ -0,0 +1,126 @@
+"""
+Logo asset pipeline for M&J Toys Inc.
+Content-addressed logo uploads, pre-sized variants and cached inline embedding
+"""
+
+import base64
+import hashlib
+import io
+import threading
+import time
+import urllib.request
+from functools import lru_cache
+
+# Logos are keyed by content hash, so an object never changes once written
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Pixel widths of the pre-sized PNG variants (templates display at 120px)
+LOGO_VARIANT_WIDTHS = (120, 240, 480)
+
+# Variant embedded in rendered documents (2x the displayed width)
+EMBED_VARIANT_WIDTH = 240
+
+# Seconds before a logo URL that failed to fetch is tried again
+FETCH_RETRY_SECONDS = 300
+
+_fetch_lock = threading.Lock()
+_failed_fetches = {}
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'svg': 'image/svg+xml',
+}
+
+def content_type_for(filename):
+    """Determine content type from filename"""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'png'
+    return extension, CONTENT_TYPES.get(extension, 'image/png')
+
+def build_variants(logo_bytes, content_type):
+    """Resize a raster logo to each variant width. Returns {width: png_bytes}"""
+    if content_type == 'image/svg+xml':
+        return {}
+
+    from PIL import Image
+
+    variants = {}
+    try:
+        with Image.open(io.BytesIO(logo_bytes)) as image:
+            image.load()
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            for width in LOGO_VARIANT_WIDTHS:
+                if width >= image.width:
+                    continue
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.LANCZOS)
+                output = io.BytesIO()
+                resized.save(output, format='PNG', optimize=True)
+                variants[width] = output.getvalue()
+    except Exception as e:
+        print(f"Could not build logo variants: {e}")
+    return variants
+
+def upload_logo(blobs, logo_bytes, filename):
+    """
+    Store a logo and its variants under content-hash keys.
+    Identical bytes are never uploaded twice. Returns the original logo URL,
+    the variant URLs keyed by width and whether anything was uploaded.
+    """
+    extension, content_type = content_type_for(filename)
+    digest = hashlib.sha256(logo_bytes).hexdigest()[:32]
+    key = f'logos/{digest}.{extension}'
+
+    uploaded = False
+    if blobs.exists(key):
+        print(f"Logo {blobs.uri(key)} already stored, skipping upload")
+    else:
+        blobs.put(key, logo_bytes, content_type=content_type, cache_control=IMMUTABLE_CACHE_CONTROL)
+        uploaded = True
+        print(f"Successfully uploaded logo to {blobs.uri(key)}")
+
+    variants = {}
+    for width, variant_bytes in build_variants(logo_bytes, content_type).items():
+        variant_key = f'logos/{digest}_w{width}.png'
+        if uploaded or not blobs.exists(variant_key):
+            blobs.put(variant_key, variant_bytes, content_type='image/png',
+                      cache_control=IMMUTABLE_CACHE_CONTROL)
+        variants[str(width)] = blobs.public_url(variant_key)
+
+    return {
+        'logo_url': blobs.public_url(key),
+        'logo_variants': variants,
+        'uploaded': uploaded,
+    }
+
+@lru_cache(maxsize=32)
+def _fetch_data_uri(url):
+    with urllib.request.urlopen(url, timeout=10) as response:
+        content_type = response.headers.get_content_type()
+        payload = response.read()
+    encoded = base64.b64encode(payload).decode('ascii')
+    return f'data:{content_type};base64,{encoded}'
+
+def logo_data_uri(settings):
+    """
+    Inline copy of the settings logo for rendering, fetched once per URL per
+    container. Returns (src, embedded): src falls back to the plain URL, with
+    embedded False, if the logo can't be fetched, and is None without a logo.
+    """
+    url = (settings.get('logo_variants') or {}).get(str(EMBED_VARIANT_WIDTH)) or settings.get('logo_url')
+    if not url:
+        return None, False
+    if time.time() - _failed_fetches.get(url, 0) < FETCH_RETRY_SECONDS:
+        return url, False
+
+    # Serialize fetches so parallel renders share a single download
+    with _fetch_lock:
+        try:
+            return _fetch_data_uri(url), True
+        except Exception as e:
+            print(f"Error fetching logo {url}: {e}")
+            _failed_fetches[url] = time.time()
+            return url, False
@@ -0,0 +1,204 @@
+"""
+In-process request metrics for M&J Toys Inc.
+Per-route latency, payload sizes, row and order counts and DynamoDB/S3 call
+timings are recorded into log-bucketed histograms (about 2% error on
+percentiles) without an external agent.
+
+MJTOYS_METRICS selects the output:
+    emf      CloudWatch embedded metric format log lines after each request
+             (default on Lambda); CloudWatch computes p50/p95/p99 from them
+    summary  a percentile table printed every MJTOYS_METRICS_FLUSH_SECONDS
+             (default elsewhere)
+    off      record for /health only
+
+Either way /health reports the per-route percentiles of this process.
+"""
+
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+
+METRICS_MODE = os.environ.get(
+    'MJTOYS_METRICS', 'emf' if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') else 'summary')
+METRICS_NAMESPACE = os.environ.get('MJTOYS_METRICS_NAMESPACE', 'MJToys')
+FLUSH_SECONDS = float(os.environ.get('MJTOYS_METRICS_FLUSH_SECONDS', '60'))
+
+# Bucket i holds values in (GROWTH ** (i - 1), GROWTH ** i]
+GROWTH = 1.04
+
+# EMF allows at most 100 values per metric per log line
+EMF_MAX_VALUES = 100
+
+class Histogram:
+    """Log-bucketed histogram plus the raw values recorded since the last EMF flush"""
+
+    def __init__(self, unit):
+        self.unit = unit
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.pending = []
+
+    def record(self, value):
+        index = math.ceil(math.log(value, GROWTH)) if value > 0 else None
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.pending.append(value)
+
+    def percentile(self, pct):
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for index in sorted(self.buckets, key=lambda i: -math.inf if i is None else i):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Midpoint of the bucket, kept within the values actually seen
+                estimate = 0.0 if index is None else GROWTH ** index * (1 + 1 / GROWTH) / 2
+                return max(self.min, min(self.max, estimate))
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 2) if self.count else 0.0,
+            'p50': round(self.percentile(50), 2),
+            'p95': round(self.percentile(95), 2),
+            'p99': round(self.percentile(99), 2),
+            'max': round(self.max, 2),
+            'unit': self.unit,
+        }
+
+# (dimensions, metric name) -> Histogram; dimensions is a tuple of (name, value)
+_histograms = {}
+_lock = threading.Lock()
+_last_flush = time.time()
+
+# Route of the request being handled, for metrics recorded deeper in the call stack
+_current_route = contextvars.ContextVar('mjtoys_route', default=None)
+
+def record(name, value, unit='Milliseconds', **dimensions):
+    key = (tuple(dimensions.items()), name)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram(unit)
+        histogram.record(float(value))
+
+def record_count(name, value):
+    """Record a count (rows, orders, ...) against the current request's route"""
+    route = _current_route.get()
+    if route:
+        record(name, value, 'Count', Route=route)
+
+def begin_request(route):
+    return _current_route.set(route)
+
+def end_request(token, route, started, request_bytes, response_bytes, status):
+    """Record a finished request, then flush if it's time"""
+    record('Latency', (time.perf_counter() - started) * 1000, Route=route)
+    record('RequestBytes', request_bytes, 'Bytes', Route=route)
+    record('ResponseBytes', response_bytes, 'Bytes', Route=route)
+    if status >= 500:
+        record('Errors', 1, 'Count', Route=route)
+    _current_route.reset(token)
+    maybe_flush()
+
+# ---------------------------------------------------------------------------
+# boto3 call timings
+# ---------------------------------------------------------------------------
+
+def _before_call(context, **kwargs):
+    context['mjtoys_started'] = time.perf_counter()
+
+def _after_call(event_name, context, **kwargs):
+    # event_name is 'after-call.<service>.<Operation>' or 'after-call-error.<service>.<Operation>'
+    started = context.pop('mjtoys_started', None)
+    if started is not None:
+        _, service, operation = event_name.split('.', 2)
+        record('CallLatency', (time.perf_counter() - started) * 1000, Service=service, Operation=operation)
+
+def instrument_client(client):
+    """Time every API call of a boto3 client, retries included"""
+    client.meta.events.register('before-call', _before_call)
+    client.meta.events.register('after-call', _after_call)
+    client.meta.events.register('after-call-error', _after_call)
+    return client
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def summary():
+    """{dimension label: {metric: {count, mean, p50, p95, p99, max, unit}}}"""
+    with _lock:
+        items = [(dimensions, name, histogram.summary()) for (dimensions, name), histogram in _histograms.items()]
+    result = {}
+    for dimensions, name, stats in sorted(items):
+        label = ' '.join(str(value) for _, value in dimensions)
+        result.setdefault(label, {})[name] = stats
+    return result
+
+def emf_lines():
+    """EMF log lines for the values recorded since the last flush, one per dimension set"""
+    groups = {}
+    with _lock:
+        for (dimensions, name), histogram in _histograms.items():
+            if histogram.pending:
+                groups.setdefault(dimensions, []).append((name, histogram.unit, histogram.pending))
+                histogram.pending = []
+
+    lines = []
+    timestamp = int(time.time() * 1000)
+    for dimensions, metrics in groups.items():
+        for start in range(0, max(len(values) for _, _, values in metrics), EMF_MAX_VALUES):
+            chunk = [(name, unit, values[start:start + EMF_MAX_VALUES])
+                     for name, unit, values in metrics if values[start:start + EMF_MAX_VALUES]]
+            document = dict(dimensions)
+            document['_aws'] = {
+                'Timestamp': timestamp,
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [[name for name, _ in dimensions]],
+                    'Metrics': [{'Name': name, 'Unit': unit} for name, unit, _ in chunk],
+                }],
+            }
+            for name, _, values in chunk:
+                document[name] = values if len(values) > 1 else values[0]
+            lines.append(json.dumps(document, separators=(',', ':')))
+    return lines
+
+def summary_table():
+    lines = [f"{'metric':<48} {'count':>7} {'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}"]
+    for label, metrics in summary().items():
+        for name, stats in metrics.items():
+            lines.append(f"{(label + ' ' + name)[:48]:<48} {stats['count']:>7} {stats['p50']:>10} "
+                         f"{stats['p95']:>10} {stats['p99']:>10} {stats['max']:>10}")
+    return '\n'.join(lines)
+
+def flush():
+    global _last_flush
+    _last_flush = time.time()
+    if METRICS_MODE == 'emf':
+        for line in emf_lines():
+            print(line)
+        return
+    with _lock:
+        # Summary mode keeps only the histograms
+        for histogram in _histograms.values():
+            histogram.pending = []
+    if METRICS_MODE == 'summary':
+        print(summary_table())
+
+def maybe_flush():
+    # Lambda may freeze the container after any request, so EMF goes out every time
+    if METRICS_MODE == 'emf' or time.time() - _last_flush >= FLUSH_SECONDS:
+        flush()
@@ -1,14 +1,10 @@
 """
 Packing Slip Template for M&J Toys Inc.
+Split into a settings-only shell (styles, company header, footer) and a
+per-order fragment, so a batch renders the shell once per settings version.
 """
 
-PACKING_SLIP_TEMPLATE = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Packing List {{ order.Order_number }}</title>
+PACKING_SLIP_STYLES = """
     <style>
         @page {
             size: Letter;
@@ -85,6 +81,11 @@ PACKING_SLIP_TEMPLATE = """
             margin: 5px 0;
         }
 
+        .barcode img {
+            width: 160px;
+            height: 40px;
+        }
+
         .invoice-number {
             font-size: 11px;
             margin: 2px 0;
@@ -186,13 +187,17 @@ PACKING_SLIP_TEMPLATE = """
             text-align: justify;
             line-height: 1.3;
         }
+
+        .page-break {
+            page-break-after: always;
+        }
     </style>
-</head>
-<body>
-    <div class="header">
-        <div class="header-top">
+"""
+
+# Company header block; depends on settings only
+PACKING_SLIP_COMPANY_HEADER = """
             <div class="logo-section">
-                <img src="{{ settings.logo_url }}" alt="M&J Toys Logo">
+                <img src="{{ logo_src or settings.logo_url }}" alt="M&J Toys Logo">
             </div>
             <div class="company-info">
                 <div class="company-name">{{ settings.company_name }}</div>
@@ -201,9 +206,26 @@ PACKING_SLIP_TEMPLATE = """
                 <div class="company-address">Tel: {{ settings.company_phone }}&nbsp;&nbsp;&nbsp;&nbsp;Fax:{{ settings.company_fax }}</div>
                 <div class="packing-list-title">Packing List</div>
             </div>
+"""
+
+# Footer block; depends on settings only
+PACKING_SLIP_FOOTER = """
+    <div class="footer">
+        {{ settings.packing_slip_footer or "Please carefully inspect the shipment quantities with this packing list , and before you sign complete on the BOL to the Carriers. Missing or damage found, your responsible to write on the BOL, and contact to us within 7 days." }}
+    </div>
+"""
+
+# Per-order pages; company_header and footer are pre-rendered markup
+PACKING_SLIP_FRAGMENT = """
+    {% set pages = pages or [{'number': 1, 'line_items': order.line_items, 'is_last': True}] %}
+    {% for page in pages %}
+    <div class="page{% if not page.is_last %} page-break{% endif %}">
+    <div class="header">
+        <div class="header-top">
+            {{ company_header }}
             <div class="packing-info">
-                <div class="barcode">*{{ order.Order_number }}*</div>
-                <div class="page-info">Page 1 of 1</div>
+                <div class="barcode">{% if barcode_uri %}<img src="{{ barcode_uri }}" alt="*{{ order.Order_number }}*">{% else %}*{{ order.Order_number }}*{% endif %}</div>
+                <div class="page-info">Page {{ page.number }} of {{ pages|length }}</div>
             </div>
         </div>
     </div>
@@ -280,7 +302,7 @@ PACKING_SLIP_TEMPLATE = """
             </tr>
         </thead>
         <tbody>
-            {% for item in order.line_items %}
+            {% for item in page.line_items %}
             <tr>
                 <td class="center">{{ item.line_number }}</td>
                 <td>{{ item.Item_no }}</td>
@@ -296,6 +318,7 @@ PACKING_SLIP_TEMPLATE = """
         </tbody>
     </table>
 
+    {% if page.is_last %}
     <div class="totals">
         <strong>Total:</strong> {{ order.line_items|length }} Items&nbsp;&nbsp;&nbsp;&nbsp;
         Total BX:&nbsp;&nbsp;&nbsp;&nbsp;
@@ -307,9 +330,22 @@ PACKING_SLIP_TEMPLATE = """
         <strong>{{ "%.2f"|format(order.Vol) }}</strong>
     </div>
 
-    <div class="footer">
-        {{ settings.packing_slip_footer or "Please carefully inspect the shipment quantities with this packing list , and before you sign complete on the BOL to the Carriers. Missing or damage found, your responsible to write on the BOL, and contact to us within 7 days." }}
+    {{ footer }}
+    {% endif %}
     </div>
-</body>
+    {% endfor %}
+"""
+
+# Complete single-document template
+PACKING_SLIP_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Packing List {{ order.Order_number }}</title>""" + PACKING_SLIP_STYLES + """</head>
+<body>
+    {% set company_header %}""" + PACKING_SLIP_COMPANY_HEADER + """    {% endset %}
+    {% set footer %}""" + PACKING_SLIP_FOOTER + """    {% endset %}""" + PACKING_SLIP_FRAGMENT + """</body>
 </html>
 """
@@ -0,0 +1,56 @@
+"""
+Page Layout Precomputation for M&J Toys Inc. documents
+Splits line items into fixed-capacity pages before template rendering
+"""
+
+import math
+
+# Page capacity in table text lines. A row costs one line per wrapped
+# line of its Description; totals and footer only appear on the last page.
+PAGE_LAYOUTS = {
+    'invoice': {
+        'lines_per_page': 38,
+        'description_chars_per_line': 48,
+        'last_page_reserve': 10,
+    },
+    'packing_slip': {
+        'lines_per_page': 38,
+        'description_chars_per_line': 58,
+        'last_page_reserve': 6,
+    },
+}
+
+def row_height(item, layout):
+    """Number of text lines a line item row occupies"""
+    description = str(item.get('Description', '') or '')
+    return max(1, math.ceil(len(description) / layout['description_chars_per_line']))
+
+def paginate_line_items(line_items, document_type):
+    """
+    Split line items into pages for the given document type.
+    Returns a list of {'number', 'line_items', 'is_last'} dicts; always at least one page.
+    """
+    layout = PAGE_LAYOUTS[document_type]
+    capacity = layout['lines_per_page']
+
+    pages = [[]]
+    used = [0]
+    for item in line_items:
+        height = min(row_height(item, layout), capacity)
+        if used[-1] + height > capacity:
+            pages.append([])
+            used.append(0)
+        pages[-1].append(item)
+        used[-1] += height
+
+    # Totals and footer must fit under the last page's rows; carry the
+    # final row over rather than leaving a page with totals only.
+    if used[-1] + layout['last_page_reserve'] > capacity:
+        carried = pages[-1].pop() if len(pages[-1]) > 1 else None
+        pages.append([carried] if carried is not None else [])
+
+    total = len(pages)
+    return [
+        {'number': i + 1, 'line_items': items, 'is_last': i + 1 == total}
+        for i, items in enumerate(pages)
+    ]
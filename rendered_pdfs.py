@@ -0,0 +1,117 @@
+"""
+Pre-rendered PDFs for M&J Toys Inc.
+Saved documents are rendered to PDF in a background step and stored in the
+blob store under content-addressed keys, so opening a document from history
+returns a presigned URL instead of rendering again.
+
+On Lambda the background step is an asynchronous self-invocation with
+{"job": "render-pdf", "document_id": ...}; elsewhere it runs on a small
+thread pool.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from document_renderer import order_hash, settings_version, render_document_pdf
+from logo_assets import IMMUTABLE_CACHE_CONTROL
+
+RENDERED_PREFIX = 'rendered'
+
+# MJTOYS_PRERENDER=0 skips background rendering (the client renders PDFs itself, as before)
+PRERENDER = os.environ.get('MJTOYS_PRERENDER', '1') != '0'
+
+# Presigned URLs outlive the window they are handed out in by at least this much
+PDF_URL_EXPIRES = 3600
+PDF_URL_WINDOW = 1800
+
+# A failed render is not retried from reads for this long (per document and settings version)
+RENDER_RETRY_SECONDS = 3600
+FAILED_SUFFIX = '.failed'
+
+_executor = None
+
+def pdf_key(document, settings):
+    """Blob key of a document's PDF: a hash of document type, order and settings version"""
+    digest = hashlib.sha256(json.dumps([
+        document.get('document_type', 'invoice'),
+        order_hash(document.get('order_data') or {}),
+        settings_version(settings),
+    ]).encode('utf-8')).hexdigest()
+    return f'{RENDERED_PREFIX}/{digest[:40]}.pdf'
+
+def renderable(document):
+    """Whether the document carries the order data a PDF is rendered from"""
+    return (document.get('order_data') or {}).get('line_items') is not None
+
+def render_and_store(storage, document, settings):
+    """Render the document's PDF unless it is already stored. Returns the key."""
+    key = pdf_key(document, settings)
+    if not storage.blobs.exists(key):
+        pdf = render_document_pdf(document.get('document_type', 'invoice'), document['order_data'], settings)
+        storage.blobs.put(key, pdf, content_type='application/pdf', cache_control=IMMUTABLE_CACHE_CONTROL)
+        print(f"Rendered {document['document_id']} to {storage.blobs.uri(key)}")
+    return key
+
+def render_failed(storage, document, settings, now):
+    """Whether a render of this document and settings version failed within RENDER_RETRY_SECONDS"""
+    marker = storage.blobs.get(pdf_key(document, settings) + FAILED_SUFFIX)
+    return marker is not None and now - float(marker) < RENDER_RETRY_SECONDS
+
+def render_saved_document(storage, document_id, get_settings):
+    """Background job body: render a saved document by ID"""
+    document = storage.documents.get(document_id)
+    if document and document.get('archive_key'):
+        # Archived documents keep only a stub in the table
+        from archive import read_archived
+        document = read_archived(storage.blobs, document)
+    if not document or not renderable(document):
+        print(f"Not rendering {document_id}: no order data")
+        return None
+
+    settings = get_settings()
+    try:
+        return render_and_store(storage, document, settings)
+    except Exception as e:
+        print(f"Error rendering PDF for {document_id}: {str(e)}")
+        # Negative marker so reads stop scheduling this render for a while
+        storage.blobs.put(pdf_key(document, settings) + FAILED_SUFFIX, str(time.time()).encode('ascii'),
+                          content_type='text/plain')
+    return None
+
+def schedule_render(storage, document_id, get_settings):
+    """Render a saved document's PDF after the response is returned"""
+    if not PRERENDER:
+        return
+    function_name = os.environ.get('AWS_LAMBDA_FUNCTION_NAME')
+    if function_name:
+        # A frozen Lambda can't finish background threads; invoke ourselves asynchronously
+        import boto3
+        from storage import aws_client_config
+
+        try:
+            boto3.client('lambda', config=aws_client_config()).invoke(
+                FunctionName=function_name,
+                InvocationType='Event',
+                Payload=json.dumps({'job': 'render-pdf', 'document_id': document_id}).encode('utf-8'),
+            )
+        except Exception as e:
+            print(f"Error scheduling PDF render for {document_id}: {str(e)}")
+        return
+
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='pdf-render')
+    _executor.submit(render_saved_document, storage, document_id, get_settings)
+
+def stored_pdf(storage, document, settings, now):
+    """
+    (presigned URL, ETag window) of the document's stored PDF, or (None, None)
+    when it hasn't been rendered yet.
+    """
+    key = pdf_key(document, settings)
+    if not storage.blobs.exists(key):
+        return None, None
+    return storage.blobs.presigned_url(key, expires_in=PDF_URL_EXPIRES), int(now // PDF_URL_WINDOW)
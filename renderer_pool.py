@@ -0,0 +1,229 @@
+"""
+Persistent renderer pool for M&J Toys Inc.
+Worker processes set their rendering engine up once (WeasyPrint with its
+font configuration and the pre-parsed invoice and packing slip stylesheets,
+or a checked wkhtmltopdf executable) and then render many documents from the
+pool's queue. Workers are replaced after a fixed number of documents to cap
+memory growth, and a worker that stops answering restarts the pool.
+
+Used by batch_generate.py and long-running servers; Lambda has no
+/dev/shm for multiprocessing and renders in-process instead.
+"""
+
+import os
+import shutil
+import subprocess
+import time
+from multiprocessing import Pool, TimeoutError
+
+from document_renderer import FRAGMENTS, render_document_html, document_stylesheet
+
+# Documents a worker renders before it is replaced
+RECYCLE_AFTER = int(os.environ.get('MJTOYS_RENDERER_RECYCLE_AFTER', '200'))
+
+# Seconds a single document may take before the pool is considered hung
+RENDER_TIMEOUT = int(os.environ.get('MJTOYS_RENDERER_TIMEOUT', '120'))
+
+class WeasyPrintEngine:
+    extension = 'pdf'
+
+    def __init__(self, options):
+        from weasyprint import CSS, HTML
+        from weasyprint.text.fonts import FontConfiguration
+
+        self._html = HTML
+        self.fonts = FontConfiguration()
+        self.stylesheets = {
+            document_type: CSS(string=document_stylesheet(document_type), font_config=self.fonts)
+            for document_type in FRAGMENTS
+        }
+        # Load fonts and WeasyPrint's own user-agent stylesheet before the first real document
+        self._html(string='<p>warm-up</p>').write_pdf(font_config=self.fonts)
+
+    def render(self, document_type, order, settings):
+        html = render_document_html(document_type, order, settings, inline_styles=False)
+        return self._html(string=html).write_pdf(
+            stylesheets=[self.stylesheets[document_type]], font_config=self.fonts)
+
+class WkhtmltopdfEngine:
+    extension = 'pdf'
+
+    def __init__(self, options):
+        self.executable = options.get('wkhtmltopdf') or shutil.which('wkhtmltopdf')
+        if not self.executable:
+            raise RuntimeError('wkhtmltopdf not found; pass --wkhtmltopdf PATH')
+        # Fail at startup rather than on every document
+        subprocess.run([self.executable, '--version'], capture_output=True, check=True)
+
+    def render(self, document_type, order, settings):
+        # wkhtmltopdf has no server mode; the worker still saves its import and setup per document
+        result = subprocess.run(
+            [self.executable, '--quiet', '--page-size', 'Letter', '--encoding', 'UTF-8', '--no-outline', '-', '-'],
+            input=render_document_html(document_type, order, settings).encode('utf-8'),
+            capture_output=True, check=True,
+        )
+        return result.stdout
+
+class HtmlEngine:
+    extension = 'html'
+
+    def __init__(self, options):
+        pass
+
+    def render(self, document_type, order, settings):
+        return render_document_html(document_type, order, settings).encode('utf-8')
+
+ENGINES = {
+    'weasyprint': WeasyPrintEngine,
+    'wkhtmltopdf': WkhtmltopdfEngine,
+    'html': HtmlEngine,
+}
+
+# Per-worker state, set by _init_worker
+_engine = None
+_engine_error = None
+_rendered = 0
+
+def _init_worker(backend, options):
+    global _engine, _engine_error
+    # An initializer that raises makes the pool respawn workers forever; fail the tasks instead
+    try:
+        _engine = ENGINES[backend](options)
+    except Exception as e:
+        _engine_error = f"{backend} renderer unavailable: {str(e)}"
+
+def _render(document_type, order, settings):
+    global _rendered
+    if _engine is None:
+        raise RuntimeError(_engine_error)
+    payload = _engine.render(document_type, order, settings)
+    _rendered += 1
+    return payload
+
+def _ping():
+    return os.getpid(), _rendered, _engine_error
+
+class RendererPool:
+    """
+    Long-lived pool of rendering workers.
+
+        with RendererPool('weasyprint', workers=4) as pool:
+            pdf = pool.render('invoice', order, settings)
+    """
+
+    def __init__(self, backend='weasyprint', workers=None, recycle_after=RECYCLE_AFTER,
+                 timeout=RENDER_TIMEOUT, options=None):
+        if backend not in ENGINES:
+            raise ValueError(f"Unknown backend: {backend}")
+        self.backend = backend
+        self.extension = ENGINES[backend].extension
+        self.workers = workers or os.cpu_count()
+        self.recycle_after = recycle_after
+        self.timeout = timeout
+        self.options = options or {}
+        self.restarts = 0
+        self._pool = None
+        self._start()
+
+    def _start(self):
+        self._pool = Pool(
+            processes=self.workers,
+            initializer=_init_worker,
+            initargs=(self.backend, self.options),
+            maxtasksperchild=self.recycle_after or None,
+        )
+
+    def restart(self):
+        """Kill every worker and start fresh ones"""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+        self.restarts += 1
+        print(f"Restarting {self.backend} renderer pool (restart {self.restarts})")
+        self._start()
+
+    def submit(self, document_type, order, settings):
+        """Queue one document; .get(timeout) on the result returns its bytes"""
+        return self._pool.apply_async(_render, (document_type, order, settings))
+
+    def result(self, pending):
+        """Bytes of a submitted document. A timeout restarts the pool and re-raises."""
+        try:
+            return pending.get(self.timeout)
+        except TimeoutError:
+            self.restart()
+            raise
+
+    def render(self, document_type, order, settings):
+        return self.result(self.submit(document_type, order, settings))
+
+    def render_many(self, jobs):
+        """
+        Render (document_type, order, settings, ...) jobs in submission order,
+        yielding (job, payload, error). A hung document fails alone: the pool
+        restarts and the documents queued behind it are submitted again.
+        Raises RuntimeError if the workers fail a health check before the
+        batch or after a restart.
+        """
+        jobs = list(jobs)
+        # Fail fast instead of failing every job when the engine can't start
+        self.check()
+        pending = [self.submit(*job[:3]) for job in jobs]
+        for i, job in enumerate(jobs):
+            try:
+                yield job, self.result(pending[i]), None
+            except TimeoutError:
+                yield job, None, f"timed out after {self.timeout}s"
+                self.check()
+                pending[i + 1:] = [self.submit(*later[:3]) for later in jobs[i + 1:]]
+            except Exception as e:
+                yield job, None, str(e)
+
+    def health(self, timeout=10):
+        """
+        Ping a worker. Returns {healthy, error, latency_ms, worker_pid,
+        worker_rendered, restarts}; an unanswered ping restarts the pool.
+        """
+        started = time.time()
+        try:
+            pid, rendered, error = self._pool.apply_async(_ping).get(timeout)
+        except Exception as e:
+            print(f"Renderer pool health check failed: {str(e)}")
+            self.restart()
+            return {'healthy': False, 'error': str(e) or 'timed out', 'restarts': self.restarts}
+        return {
+            'healthy': error is None,
+            'error': error,
+            'latency_ms': round((time.time() - started) * 1000, 1),
+            'worker_pid': pid,
+            'worker_rendered': rendered,
+            'restarts': self.restarts,
+        }
+
+    def check(self, attempts=2):
+        """Raise RuntimeError unless a worker answers a ping with a loaded engine"""
+        for _ in range(attempts):
+            status = self.health()
+            if status['healthy']:
+                return status
+            if 'worker_pid' in status:
+                # The worker answered, so its engine failed to load; a restart won't help
+                break
+        raise RuntimeError(f"{self.backend} renderer pool is unhealthy: {status['error']}")
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        elif self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
@@ -0,0 +1,80 @@
+"""
+Streaming S3 multipart upload writer for M&J Toys Inc.
+"""
+
+import io
+
+# S3 requires every part except the last to be at least 5 MB
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+class MultipartUploadWriter(io.RawIOBase):
+    """
+    Write-only file object that streams its content into an S3 multipart upload.
+    Only one part is buffered in memory at a time. Use as a context manager:
+    the upload completes on a clean exit and is aborted if an exception escapes.
+    """
+
+    def __init__(self, s3_client, bucket, key, content_type='application/octet-stream',
+                 part_size=DEFAULT_PART_SIZE, **extra_args):
+        super().__init__()
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self._buffer = bytearray()
+        self._parts = []
+        self._position = 0
+        response = s3_client.create_multipart_upload(
+            Bucket=bucket, Key=key, ContentType=content_type, **extra_args
+        )
+        self.upload_id = response['UploadId']
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer.extend(data)
+        self._position += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def _upload_part(self, body):
+        part_number = len(self._parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            PartNumber=part_number, Body=body
+        )
+        self._parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+
+    def complete(self):
+        """Upload the remaining buffer and finish the multipart upload"""
+        if self._buffer or not self._parts:
+            self._upload_part(bytes(self._buffer))
+            self._buffer.clear()
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            MultipartUpload={'Parts': self._parts}
+        )
+        print(f"Completed multipart upload s3://{self.bucket}/{self.key} "
+              f"({self._position} bytes, {len(self._parts)} parts)")
+
+    def abort(self):
+        """Abort the upload so S3 discards any uploaded parts"""
+        self._buffer.clear()
+        self.s3_client.abort_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+        )
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.complete()
+        else:
+            print(f"Aborting multipart upload s3://{self.bucket}/{self.key}: {exc}")
+            self.abort()
+        super().close()
+        return False
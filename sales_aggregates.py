@@ -0,0 +1,93 @@
+"""
+Pre-aggregated Sales Counters for M&J Toys Inc.
+Saved invoices add their totals to customer, sales rep, day and grand-total
+buckets, so reports read a handful of counter items instead of every document.
+"""
+
+from datetime import datetime, timedelta
+
+# Order totals summed into every bucket (document_count is added alongside)
+COUNTERS = ('Sales_Amount', 'Total_Discount', 'Total_Case', 'Total_WT', 'Vol')
+
+DIMENSIONS = ('customer', 'rep', 'day', 'total')
+
+# Longest day range a single report request may read
+MAX_REPORT_DAYS = 366
+
+def _order_day(document):
+    """Invoice date as YYYY-MM-DD, falling back to the save date"""
+    order = document.get('order_data') or {}
+    invoice_date = order.get('Invoice_Date')
+    if invoice_date and isinstance(invoice_date, str):
+        try:
+            return datetime.strptime(invoice_date, '%m/%d/%Y').strftime('%Y-%m-%d')
+        except ValueError:
+            pass
+    return str(document.get('created_at', ''))[:10] or datetime.utcnow().strftime('%Y-%m-%d')
+
+def bucket_key(dimension, key=''):
+    return 'total' if dimension == 'total' else f'{dimension}#{str(key).strip().upper()}'
+
+def document_buckets(document):
+    """Buckets an invoice contributes to"""
+    order = document.get('order_data') or {}
+    return [
+        bucket_key('customer', order.get('Customer_ID') or 'UNKNOWN'),
+        bucket_key('rep', order.get('Sales_rep') or 'UNKNOWN'),
+        bucket_key('day', _order_day(document)),
+        bucket_key('total'),
+    ]
+
+def document_deltas(document, sign=1):
+    """Counter increments for a document (sign=-1 to retract a document)"""
+    order = document.get('order_data') or {}
+    deltas = {'document_count': sign}
+    for counter in COUNTERS:
+        try:
+            deltas[counter] = sign * float(order.get(counter) or 0)
+        except (TypeError, ValueError):
+            deltas[counter] = 0.0
+    return deltas
+
+def record_document(aggregates, document, sign=1):
+    """Apply a saved document to the sales counters. Only invoices count toward sales."""
+    if document.get('document_type') != 'invoice':
+        return False
+    aggregates.increment(document_buckets(document), document_deltas(document, sign))
+    return True
+
+def _days_between(date_from, date_to):
+    start = datetime.strptime(date_from, '%Y-%m-%d')
+    end = datetime.strptime(date_to, '%Y-%m-%d')
+    days = (end - start).days + 1
+    if days > MAX_REPORT_DAYS:
+        raise ValueError(f'Date range is limited to {MAX_REPORT_DAYS} days')
+    return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(max(days, 0))]
+
+def read_report(aggregates, params):
+    """
+    Read counters for one dimension. params: dimension (customer, rep, day or
+    total), keys (comma-separated) or, for days, date_from/date_to.
+    """
+    dimension = params.get('dimension', 'total')
+    if dimension not in DIMENSIONS:
+        raise ValueError(f'Unknown report dimension: {dimension}')
+
+    if dimension == 'total':
+        keys = ['']
+    elif dimension == 'day' and params.get('date_from'):
+        keys = _days_between(params['date_from'], params.get('date_to') or params['date_from'])
+    else:
+        keys = [k for k in (params.get('keys') or '').split(',') if k.strip()]
+        if not keys:
+            raise ValueError('Provide keys (or date_from/date_to for the day dimension)')
+
+    buckets = {bucket_key(dimension, key): key for key in keys}
+    counters = aggregates.get(list(buckets))
+    results = {}
+    for bucket, key in buckets.items():
+        if bucket in counters:
+            values = {name: float(value) for name, value in counters[bucket].items()}
+            values['document_count'] = int(values.get('document_count', 0))
+            results[key or 'total'] = values
+    return {'dimension': dimension, 'results': results}
@@ -0,0 +1,184 @@
+"""
+Document Search Index for M&J Toys Inc.
+Inverted index over saved documents, maintained on save, so searches are
+answered with key queries instead of scanning the documents table.
+
+Index entries are keyed by a term (e.g. "order#10802", "customer#CA9447")
+and a sort key of "<created_at>#<document_id>", so every term doubles as a
+created_at range index.
+
+Rebuild the index from existing documents with:
+    python search_index.py --rebuild
+"""
+
+import base64
+import json
+import re
+from datetime import datetime
+
+# Search parameter -> term prefix, in order of preference for the primary query.
+# Entries don't carry item numbers, so an item search is always the primary one.
+TERM_FIELDS = [
+    ('item_no', 'item'),
+    ('order_number', 'order'),
+    ('po_no', 'po'),
+    ('customer_id', 'customer'),
+    ('company', 'company'),
+]
+
+MAX_PAGE_SIZE = 200
+DEFAULT_PAGE_SIZE = 50
+
+# Upper bound that sorts after any created_at suffix
+RANGE_END = '\uffff'
+
+def _normalize(value):
+    return re.sub(r'\s+', ' ', str(value or '')).strip().upper()
+
+def company_tokens(company):
+    """Searchable words of a company name"""
+    return [token for token in re.split(r'[^0-9A-Z&]+', _normalize(company)) if len(token) > 1]
+
+def _summary(document):
+    order = document.get('order_data') or {}
+    return {
+        'document_id': document['document_id'],
+        'document_type': document.get('document_type', ''),
+        'order_number': str(document.get('order_number') or order.get('Order_number') or ''),
+        'customer_id': order.get('Customer_ID') or '',
+        'po_no': order.get('PO_No') or '',
+        'company': order.get('Recipient_Company') or '',
+        'created_at': document.get('created_at', ''),
+    }
+
+def index_terms(document):
+    """All index terms of a document"""
+    order = document.get('order_data') or {}
+    summary = _summary(document)
+    terms = set()
+
+    if summary['order_number']:
+        terms.add(f"order#{_normalize(summary['order_number'])}")
+    if summary['po_no']:
+        terms.add(f"po#{_normalize(summary['po_no'])}")
+    if summary['customer_id']:
+        terms.add(f"customer#{_normalize(summary['customer_id'])}")
+    for token in company_tokens(summary['company']):
+        terms.add(f'company#{token}')
+    for item in order.get('line_items') or []:
+        if item.get('Item_no'):
+            terms.add(f"item#{_normalize(item['Item_no'])}")
+    if summary['created_at']:
+        terms.add(f"month#{summary['created_at'][:7]}")
+    return terms
+
+def index_entries(document):
+    """Index rows for a document: one per term, each carrying the document summary"""
+    summary = _summary(document)
+    sort_key = f"{summary['created_at']}#{summary['document_id']}"
+    return [dict(summary, term=term, sort_key=sort_key) for term in sorted(index_terms(document))]
+
+def encode_token(token):
+    return base64.urlsafe_b64encode(json.dumps(token).encode('utf-8')).decode('ascii')
+
+def decode_token(token):
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise ValueError('Invalid next_token')
+
+def _months_between(date_from, date_to):
+    """YYYY-MM buckets from date_to back to date_from (newest first)"""
+    start = datetime.strptime(date_from[:7], '%Y-%m')
+    end = datetime.strptime(date_to[:7], '%Y-%m')
+    months = []
+    year, month = end.year, end.month
+    while (year, month) >= (start.year, start.month):
+        months.append(f'{year:04d}-{month:02d}')
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months
+
+def _matches(entry, params, company_words):
+    """Secondary filters applied to entries found through the primary term"""
+    for field, _ in TERM_FIELDS:
+        if field in ('company', 'item_no') or not params.get(field):
+            continue
+        if _normalize(entry.get(field)) != _normalize(params[field]):
+            return False
+    if company_words and not set(company_words) <= set(company_tokens(entry.get('company'))):
+        return False
+    if params.get('document_type') and entry.get('document_type') != params['document_type']:
+        return False
+    return True
+
+def search_documents(index, params):
+    """
+    Search the index. params may contain order_number, customer_id, po_no,
+    company, item_no, document_type, date_from, date_to, limit and next_token.
+    Returns {'results', 'next_token'}.
+    """
+    limit = max(1, min(int(params.get('limit') or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    date_from = params.get('date_from') or ''
+    date_to = params.get('date_to') or ''
+    start = date_from or '0000'
+    end = (date_to or '9999') + RANGE_END
+    company_words = company_tokens(params.get('company'))
+
+    # Primary terms: the most selective criterion, or month buckets for date-only searches
+    terms = None
+    for field, prefix in TERM_FIELDS:
+        if field == 'company' and company_words:
+            terms = [f'company#{company_words[0]}']
+            break
+        if field != 'company' and params.get(field):
+            terms = [f'{prefix}#{_normalize(params[field])}']
+            break
+    if terms is None:
+        if not date_from:
+            raise ValueError('Provide a search field or a date_from/date_to range')
+        last_day = date_to or datetime.utcnow().strftime('%Y-%m-%d')
+        terms = [f'month#{month}' for month in _months_between(date_from, last_day)]
+
+    cursor = decode_token(params['next_token']) if params.get('next_token') else {'term': 0, 'before': None}
+    term_index, before = cursor['term'], cursor['before']
+
+    results = []
+    while term_index < len(terms) and len(results) < limit:
+        entries = index.query(terms[term_index], start, end, before=before, limit=limit)
+        for entry in entries:
+            before = entry['sort_key']
+            if _matches(entry, params, company_words):
+                results.append({k: v for k, v in entry.items() if k not in ('term', 'sort_key')})
+                if len(results) == limit:
+                    break
+        if len(results) < limit and len(entries) < limit:
+            term_index, before = term_index + 1, None
+
+    next_token = None
+    if term_index < len(terms):
+        next_token = encode_token({'term': term_index, 'before': before})
+    return {'results': results, 'next_token': next_token}
+
+def rebuild_index(storage):
+    """Index every stored document (one-off backfill; scans the documents table)"""
+    from document_export import resolve_archived
+
+    count = 0
+    # Archive stubs have no line items; index the full documents
+    for document in resolve_archived(storage.documents.scan(), storage.blobs):
+        storage.index.put_entries(index_entries(document))
+        count += 1
+    print(f"Indexed {count} documents")
+    return count
+
+if __name__ == '__main__':
+    import argparse
+    from storage import get_storage
+
+    parser = argparse.ArgumentParser(description='Maintain the document search index')
+    parser.add_argument('--rebuild', action='store_true', help='index every stored document')
+    args = parser.parse_args()
+    if args.rebuild:
+        rebuild_index(get_storage())
+    else:
+        parser.print_help()
@@ -0,0 +1,138 @@
+"""
+Standalone HTTP server for M&J Toys Inc.
+Maps plain HTTP requests onto lambda_handler (function URL event format) so
+the API can run on container hosts under a multi-process gunicorn server.
+
+Usage:
+    pip install -r requirements-server.txt
+    python server.py --port 8000 --workers 4
+"""
+
+import argparse
+import base64
+import os
+from http import HTTPStatus
+from urllib.parse import parse_qsl
+
+def environ_to_event(environ):
+    """Build a Lambda function URL (payload v2.0) event from a WSGI environ"""
+    method = environ['REQUEST_METHOD']
+    path = environ.get('PATH_INFO') or '/'
+    raw_query = environ.get('QUERY_STRING', '')
+
+    headers = {}
+    for key, value in environ.items():
+        if key.startswith('HTTP_'):
+            headers[key[5:].replace('_', '-').lower()] = value
+    if environ.get('CONTENT_TYPE'):
+        headers['content-type'] = environ['CONTENT_TYPE']
+    if environ.get('CONTENT_LENGTH'):
+        headers['content-length'] = environ['CONTENT_LENGTH']
+
+    # Function URLs join repeated query parameters with commas
+    query_params = {}
+    if raw_query:
+        for name, value in parse_qsl(raw_query, keep_blank_values=True):
+            query_params[name] = f'{query_params[name]},{value}' if name in query_params else value
+
+    length = int(environ.get('CONTENT_LENGTH') or 0)
+    body_bytes = environ['wsgi.input'].read(length) if length else b''
+    try:
+        body = body_bytes.decode('utf-8')
+        is_base64 = False
+    except UnicodeDecodeError:
+        body = base64.b64encode(body_bytes).decode('ascii')
+        is_base64 = True
+
+    event = {
+        'version': '2.0',
+        'rawPath': path,
+        'rawQueryString': raw_query,
+        'headers': headers,
+        'requestContext': {
+            'http': {
+                'method': method,
+                'path': path,
+                'protocol': environ.get('SERVER_PROTOCOL', 'HTTP/1.1'),
+                'sourceIp': environ.get('REMOTE_ADDR', ''),
+                'userAgent': headers.get('user-agent', ''),
+            }
+        },
+        'isBase64Encoded': is_base64,
+    }
+    if query_params:
+        event['queryStringParameters'] = query_params
+    if body_bytes:
+        event['body'] = body
+    return event
+
+def application(environ, start_response):
+    """WSGI entry point wrapping lambda_handler"""
+    # Imported in the worker, not the gunicorn master: lambda_function opens
+    # storage at import time, and SQLite connections can't cross a fork
+    from lambda_function import lambda_handler
+
+    response = lambda_handler(environ_to_event(environ), None)
+
+    status_code = int(response.get('statusCode', 200))
+    try:
+        reason = HTTPStatus(status_code).phrase
+    except ValueError:
+        reason = ''
+
+    body = response.get('body') or ''
+    if response.get('isBase64Encoded'):
+        payload = base64.b64decode(body)
+    else:
+        payload = body.encode('utf-8')
+
+    headers = [(name, str(value)) for name, value in (response.get('headers') or {}).items()]
+    headers.append(('Content-Length', str(len(payload))))
+    start_response(f'{status_code} {reason}', headers)
+    return [payload]
+
+def run(host, port, workers, threads, keepalive, graceful_timeout, max_requests):
+    """Serve the API with gunicorn pre-forked workers"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit("gunicorn is required: pip install -r requirements-server.txt")
+
+    class StandaloneApplication(BaseApplication):
+        def load_config(self):
+            options = {
+                'bind': f'{host}:{port}',
+                'workers': workers,
+                'worker_class': 'gthread',
+                'threads': threads,
+                'keepalive': keepalive,
+                'graceful_timeout': graceful_timeout,
+                'timeout': 120,
+                # Recycle workers periodically to cap memory growth
+                'max_requests': max_requests,
+                'max_requests_jitter': max(1, max_requests // 10),
+                'accesslog': '-',
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return application
+
+    StandaloneApplication().run()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the M&J Toys API as a standalone HTTP server')
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', '8000')))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--threads', type=int, default=4, help='threads per worker process')
+    parser.add_argument('--keepalive', type=int, default=5, help='seconds to hold idle keep-alive connections')
+    parser.add_argument('--graceful-timeout', type=int, default=30,
+                        help='seconds in-flight requests get to finish on SIGTERM')
+    parser.add_argument('--max-requests', type=int, default=5000,
+                        help='requests served before a worker is recycled')
+    args = parser.parse_args()
+
+    run(args.host, args.port, args.workers, args.threads, args.keepalive,
+        args.graceful_timeout, args.max_requests)
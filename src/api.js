@@ -48,11 +48,21 @@ export const getDocument = async (documentId) => {
   return response.data
 }
 
+export const getDocuments = async (documentIds) => {
+  const response = await api.post('/get-documents', { document_ids: documentIds })
+  return response.data
+}
+
 export const saveDocument = async (documentData) => {
   const response = await api.post('/save-document', { document: documentData })
   return response.data
 }
 
+export const renderHtml = async (order, documentType) => {
+  const response = await api.post('/render-html', { order, document_type: documentType })
+  return response.data
+}
+
 export const generatePDF = async (htmlContent) => {
   // This is a placeholder - PDF generation is now client-side using react-pdf
   // For backwards compatibility, return a mock response
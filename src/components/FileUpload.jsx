@@ -10,11 +10,11 @@ const FileUpload = ({ onFileProcessed }) => {
   const handleFileChange = (e) => {
     const selectedFile = e.target.files[0]
     if (selectedFile) {
-      if (selectedFile.name.endsWith('.xlsx') || selectedFile.name.endsWith('.xls')) {
+      if (['.xlsx', '.xls', '.xlsb'].some(ext => selectedFile.name.endsWith(ext))) {
         setFile(selectedFile)
         setError('')
       } else {
-        setError('Please select an Excel file (.xlsx or .xls)')
+        setError('Please select an Excel file (.xlsx, .xls or .xlsb)')
         setFile(null)
       }
     }
@@ -75,7 +75,7 @@ const FileUpload = ({ onFileProcessed }) => {
         <input
           type="file"
           id="file-input"
-          accept=".xlsx,.xls"
+          accept=".xlsx,.xls,.xlsb"
           onChange={handleFileChange}
           className="file-input"
         />
@@ -115,7 +115,7 @@ const FileUpload = ({ onFileProcessed }) => {
       <div className="upload-info">
         <p><strong>Excel File Format:</strong></p>
         <ul>
-          <li>Supported formats: .xlsx, .xls</li>
+          <li>Supported formats: .xlsx, .xls, .xlsb</li>
           <li>Must contain Order_number column</li>
           <li>See sample template for reference</li>
         </ul>
@@ -56,9 +56,24 @@ const HistoryPage = () => {
     }
   }
 
-  const handleDownloadPDF = async (doc) => {
-    setGeneratingPDF(doc.document_id)
+  // Archived documents are listed as stubs; fetch the full document before rendering
+  const withOrderData = async (doc) => {
+    if (!doc.archive_key) return doc
+    const result = await getDocument(doc.document_id)
+    return result.document || doc
+  }
+
+  const handleDownloadPDF = async (listedDoc) => {
+    setGeneratingPDF(listedDoc.document_id)
     try {
+      // Use the PDF pre-rendered at save time when it's ready
+      const result = await getDocument(listedDoc.document_id)
+      if (result.pdf_url) {
+        window.open(result.pdf_url, '_blank')
+        return
+      }
+
+      const doc = result.document || await withOrderData(listedDoc)
       // Regenerate PDF from order data
       const DocumentComponent = doc.document_type === 'invoice' ? InvoiceTemplate : PackingSlipTemplate
       const blob = await pdf(<DocumentComponent order={doc.order_data} settings={settings} />).toBlob()
@@ -79,8 +94,9 @@ const HistoryPage = () => {
     }
   }
 
-  const handlePrintDocument = async (doc) => {
+  const handlePrintDocument = async (listedDoc) => {
     try {
+      const doc = await withOrderData(listedDoc)
       // Regenerate PDF for printing
       const DocumentComponent = doc.document_type === 'invoice' ? InvoiceTemplate : PackingSlipTemplate
       const blob = await pdf(<DocumentComponent order={doc.order_data} settings={settings} />).toBlob()
@@ -0,0 +1,644 @@
+"""
+Storage Layer for M&J Toys Inc.
+Settings, documents and blobs behind one interface with three backends:
+  - dynamodb: DynamoDB tables + S3 bucket on tuned boto3 clients (production)
+  - sqlite:   embedded SQLite database + local directory for blobs
+  - memory:   in-process dictionaries (tests and load benchmarks)
+Select the backend with the MJTOYS_STORAGE environment variable.
+"""
+
+import base64
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+STORAGE_BACKEND = os.environ.get('MJTOYS_STORAGE', 'dynamodb')
+AWS_REGION = os.environ.get('MJTOYS_AWS_REGION', 'us-east-1')
+S3_BUCKET = os.environ.get('MJTOYS_S3_BUCKET', 'prompt-images-nerd')
+SETTINGS_TABLE = os.environ.get('MJTOYS_SETTINGS_TABLE', 'MJToys_Settings')
+DOCUMENTS_TABLE = os.environ.get('MJTOYS_DOCUMENTS_TABLE', 'MJToys_Documents')
+INDEX_TABLE = os.environ.get('MJTOYS_INDEX_TABLE', 'MJToys_DocumentIndex')
+AGGREGATES_TABLE = os.environ.get('MJTOYS_AGGREGATES_TABLE', 'MJToys_Aggregates')
+SQLITE_PATH = os.environ.get('MJTOYS_SQLITE_PATH', 'mjtoys.db')
+BLOB_DIR = os.environ.get('MJTOYS_BLOB_DIR', 'mjtoys_blobs')
+
+# Connection pool size per boto3 client; keep >= the widest thread pool used
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get('MJTOYS_AWS_POOL_SIZE', '50'))
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_SIZE = 100
+BATCH_GET_WORKERS = 8
+BATCH_GET_ATTEMPTS = 8
+
+def _json_default(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, bytes):
+        return {'__bytes__': base64.b64encode(obj).decode('ascii')}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _bytes_hook(obj):
+    if len(obj) == 1 and '__bytes__' in obj:
+        return base64.b64decode(obj['__bytes__'])
+    return obj
+
+def _dumps(item):
+    return json.dumps(item, default=_json_default)
+
+def _loads(text):
+    """Inverse of _dumps, restoring binary attributes"""
+    return json.loads(text, object_hook=_bytes_hook)
+
+def to_dynamo(value):
+    """Convert floats to Decimal recursively (DynamoDB rejects float)"""
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {k: to_dynamo(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [to_dynamo(v) for v in value]
+    return value
+
+# ---------------------------------------------------------------------------
+# DynamoDB / S3 backend
+# ---------------------------------------------------------------------------
+
+def aws_client_config():
+    """botocore config with keep-alive, a sized connection pool and adaptive retries"""
+    from botocore.config import Config
+
+    return Config(
+        region_name=AWS_REGION,
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=3,
+        read_timeout=10,
+        retries={'max_attempts': 8, 'mode': 'adaptive'}
+    )
+
+class DynamoDBSettingsRepository:
+    def __init__(self, table):
+        self.table = table
+
+    def get(self, setting_key):
+        response = self.table.get_item(Key={'setting_key': setting_key})
+        return response.get('Item')
+
+    def put(self, item):
+        self.table.put_item(Item=to_dynamo(item))
+
+class DynamoDBDocumentRepository:
+    def __init__(self, table):
+        self.table = table
+
+    def get(self, document_id):
+        response = self.table.get_item(Key={'document_id': document_id})
+        return response.get('Item')
+
+    def get_many(self, document_ids):
+        """Documents by ID via concurrent BatchGetItem calls; missing IDs are left out"""
+        document_ids = list(dict.fromkeys(document_ids))
+        chunks = [document_ids[i:i + BATCH_GET_SIZE] for i in range(0, len(document_ids), BATCH_GET_SIZE)]
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(BATCH_GET_WORKERS, len(chunks) or 1)) as executor:
+            for items in executor.map(self._batch_get, chunks):
+                results.update((item['document_id'], item) for item in items)
+        return results
+
+    def _batch_get(self, document_ids):
+        items = []
+        request = {self.table.name: {'Keys': [{'document_id': d} for d in document_ids]}}
+        for attempt in range(BATCH_GET_ATTEMPTS):
+            response = self.table.meta.client.batch_get_item(RequestItems=request)
+            items.extend(response.get('Responses', {}).get(self.table.name, []))
+            # Throttled keys and keys past the 16 MB response limit come back unprocessed
+            request = response.get('UnprocessedKeys')
+            if not request:
+                return items
+            time.sleep(min(2.0, 0.05 * 2 ** attempt))
+        raise RuntimeError(f"{len(request[self.table.name]['Keys'])} documents still unprocessed "
+                           f"after {BATCH_GET_ATTEMPTS} BatchGetItem attempts")
+
+    def put(self, item):
+        self.table.put_item(Item=to_dynamo(item))
+
+    def put_if_absent(self, item):
+        """Conditional put; returns False when the document_id already exists"""
+        from botocore.exceptions import ClientError
+
+        try:
+            self.table.put_item(Item=to_dynamo(item), ConditionExpression='attribute_not_exists(document_id)')
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+    def scan(self):
+        """Return every document, following scan pagination"""
+        items = []
+        kwargs = {}
+        while True:
+            response = self.table.scan(**kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def scan_segment(self, segment, total_segments):
+        """Yield (items, consumed read units) per page of one parallel scan segment"""
+        kwargs = {'Segment': segment, 'TotalSegments': total_segments, 'ReturnConsumedCapacity': 'TOTAL'}
+        while True:
+            response = self.table.scan(**kwargs)
+            yield response.get('Items', []), response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+            if 'LastEvaluatedKey' not in response:
+                return
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+class DynamoDBSearchIndexRepository:
+    """Inverted index: partition key `term`, sort key `sort_key` (created_at#document_id)"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def put_entries(self, entries):
+        with self.table.batch_writer(overwrite_by_pkeys=['term', 'sort_key']) as batch:
+            for entry in entries:
+                batch.put_item(Item=to_dynamo(entry))
+
+    def query(self, term, start, end, before=None, limit=50):
+        """Entries for a term with start <= sort_key <= end (and < before), newest first"""
+        from boto3.dynamodb.conditions import Key
+
+        kwargs = {
+            'KeyConditionExpression': Key('term').eq(term) & Key('sort_key').between(start, end),
+            'ScanIndexForward': False,
+            'Limit': limit,
+        }
+        if before:
+            kwargs['ExclusiveStartKey'] = {'term': term, 'sort_key': before}
+
+        items = []
+        while len(items) < limit:
+            response = self.table.query(**kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return items[:limit]
+
+class DynamoDBAggregatesRepository:
+    """Counter items keyed by `bucket`, updated with atomic ADD"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def increment(self, buckets, deltas):
+        """Add deltas to every bucket in a single transaction"""
+        names = {f'#c{i}': counter for i, counter in enumerate(deltas)}
+        values = {f':c{i}': to_dynamo(delta) for i, delta in enumerate(deltas.values())}
+        expression = 'ADD ' + ', '.join(f'#c{i} :c{i}' for i in range(len(deltas)))
+        self.table.meta.client.transact_write_items(TransactItems=[
+            {'Update': {
+                'TableName': self.table.name,
+                'Key': {'bucket': bucket},
+                'UpdateExpression': expression,
+                'ExpressionAttributeNames': names,
+                'ExpressionAttributeValues': values,
+            }}
+            for bucket in buckets
+        ])
+
+    def get(self, buckets):
+        """Counters for each bucket that exists, keyed by bucket"""
+        results = {}
+        buckets = list(dict.fromkeys(buckets))
+        for i in range(0, len(buckets), 100):
+            request = {self.table.name: {'Keys': [{'bucket': b} for b in buckets[i:i + 100]]}}
+            while request:
+                response = self.table.meta.client.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get(self.table.name, []):
+                    results[item.pop('bucket')] = item
+                request = response.get('UnprocessedKeys')
+        return results
+
+class S3BlobStore:
+    def __init__(self, client, bucket):
+        self.client = client
+        self.bucket = bucket
+
+    def put(self, key, body, content_type='application/octet-stream', cache_control=None):
+        extra = {'CacheControl': cache_control} if cache_control else {}
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=body,
+                               ContentType=content_type, **extra)
+
+    def get(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def uri(self, key):
+        return f's3://{self.bucket}/{key}'
+
+    def public_url(self, key):
+        return f'https://{self.bucket}.s3.{AWS_REGION}.amazonaws.com/{key}'
+
+    def presigned_url(self, key, expires_in=3600):
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': key}, ExpiresIn=expires_in
+        )
+
+    def open_writer(self, key, content_type='application/octet-stream'):
+        """Streaming writer backed by a multipart upload"""
+        from s3_multipart import MultipartUploadWriter
+
+        return MultipartUploadWriter(self.client, self.bucket, key, content_type=content_type)
+
+# ---------------------------------------------------------------------------
+# SQLite / filesystem backend
+# ---------------------------------------------------------------------------
+
+class SQLiteDatabase:
+    """Shared connection guarded by a lock; WAL mode for concurrent readers"""
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+
+    def execute(self, sql, params=()):
+        with self.lock:
+            cursor = self.connection.execute(sql, params)
+            rows = cursor.fetchall()
+            self.connection.commit()
+            return rows
+
+    def executemany(self, sql, seq_of_params):
+        with self.lock:
+            self.connection.executemany(sql, seq_of_params)
+            self.connection.commit()
+
+    def execute_count(self, sql, params=()):
+        """Run a write statement and return the number of rows it changed"""
+        with self.lock:
+            cursor = self.connection.execute(sql, params)
+            self.connection.commit()
+            return cursor.rowcount
+
+class SQLiteSettingsRepository:
+    def __init__(self, db):
+        self.db = db
+        db.execute('CREATE TABLE IF NOT EXISTS settings (setting_key TEXT PRIMARY KEY, item TEXT NOT NULL)')
+
+    def get(self, setting_key):
+        rows = self.db.execute('SELECT item FROM settings WHERE setting_key = ?', (setting_key,))
+        return _loads(rows[0][0]) if rows else None
+
+    def put(self, item):
+        self.db.execute('INSERT OR REPLACE INTO settings (setting_key, item) VALUES (?, ?)',
+                        (item['setting_key'], _dumps(item)))
+
+class SQLiteDocumentRepository:
+    def __init__(self, db):
+        self.db = db
+        db.execute('CREATE TABLE IF NOT EXISTS documents '
+                   '(document_id TEXT PRIMARY KEY, created_at TEXT, item TEXT NOT NULL)')
+
+    def get(self, document_id):
+        rows = self.db.execute('SELECT item FROM documents WHERE document_id = ?', (document_id,))
+        return _loads(rows[0][0]) if rows else None
+
+    def get_many(self, document_ids):
+        document_ids = list(dict.fromkeys(document_ids))
+        results = {}
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(document_ids), 500):
+            chunk = document_ids[i:i + 500]
+            rows = self.db.execute(
+                f"SELECT document_id, item FROM documents WHERE document_id IN ({','.join('?' * len(chunk))})",
+                tuple(chunk))
+            results.update((document_id, _loads(item)) for document_id, item in rows)
+        return results
+
+    def put(self, item):
+        self.db.execute('INSERT OR REPLACE INTO documents (document_id, created_at, item) VALUES (?, ?, ?)',
+                        (item['document_id'], item.get('created_at', ''), _dumps(item)))
+
+    def put_if_absent(self, item):
+        changed = self.db.execute_count(
+            'INSERT OR IGNORE INTO documents (document_id, created_at, item) VALUES (?, ?, ?)',
+            (item['document_id'], item.get('created_at', ''), _dumps(item)))
+        return changed == 1
+
+    def scan(self):
+        return [_loads(row[0]) for row in self.db.execute('SELECT item FROM documents')]
+
+    def scan_segment(self, segment, total_segments, page_size=500):
+        last_rowid = -1
+        while True:
+            rows = self.db.execute('SELECT rowid, item FROM documents WHERE rowid % ? = ? AND rowid > ? '
+                                   'ORDER BY rowid LIMIT ?', (total_segments, segment, last_rowid, page_size))
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            yield [_loads(row[1]) for row in rows], 0
+
+class SQLiteSearchIndexRepository:
+    def __init__(self, db):
+        self.db = db
+        db.execute('CREATE TABLE IF NOT EXISTS search_index '
+                   '(term TEXT NOT NULL, sort_key TEXT NOT NULL, item TEXT NOT NULL, '
+                   'PRIMARY KEY (term, sort_key))')
+
+    def put_entries(self, entries):
+        self.db.executemany('INSERT OR REPLACE INTO search_index (term, sort_key, item) VALUES (?, ?, ?)',
+                            [(e['term'], e['sort_key'], _dumps(e)) for e in entries])
+
+    def query(self, term, start, end, before=None, limit=50):
+        sql = 'SELECT item FROM search_index WHERE term = ? AND sort_key BETWEEN ? AND ?'
+        params = [term, start, end]
+        if before:
+            sql += ' AND sort_key < ?'
+            params.append(before)
+        sql += ' ORDER BY sort_key DESC LIMIT ?'
+        params.append(limit)
+        return [_loads(row[0]) for row in self.db.execute(sql, params)]
+
+class SQLiteAggregatesRepository:
+    def __init__(self, db):
+        self.db = db
+        db.execute('CREATE TABLE IF NOT EXISTS aggregates '
+                   '(bucket TEXT NOT NULL, counter TEXT NOT NULL, value REAL NOT NULL, '
+                   'PRIMARY KEY (bucket, counter))')
+
+    def increment(self, buckets, deltas):
+        # executemany runs in one transaction, so all buckets move together
+        self.db.executemany(
+            'INSERT INTO aggregates (bucket, counter, value) VALUES (?, ?, ?) '
+            'ON CONFLICT (bucket, counter) DO UPDATE SET value = value + excluded.value',
+            [(bucket, counter, delta) for bucket in buckets for counter, delta in deltas.items()]
+        )
+
+    def get(self, buckets):
+        buckets = list(dict.fromkeys(buckets))
+        if not buckets:
+            return {}
+        placeholders = ', '.join('?' for _ in buckets)
+        rows = self.db.execute(f'SELECT bucket, counter, value FROM aggregates WHERE bucket IN ({placeholders})',
+                               buckets)
+        results = {}
+        for bucket, counter, value in rows:
+            results.setdefault(bucket, {})[counter] = value
+        return results
+
+class _FileBlobWriter(io.FileIO):
+    """Writes to a temporary file that replaces the blob only on a clean exit"""
+
+    def __init__(self, path):
+        self.final_path = path
+        super().__init__(path + '.partial', 'wb')
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        if exc_type is None:
+            os.replace(self.name, self.final_path)
+        else:
+            os.remove(self.name)
+        return False
+
+class FileBlobStore:
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid blob key: {key}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def put(self, key, body, content_type='application/octet-stream', cache_control=None):
+        with self.open_writer(key) as f:
+            f.write(body)
+
+    def get(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def uri(self, key):
+        return f'file://{self._path(key)}'
+
+    def public_url(self, key):
+        return self.uri(key)
+
+    def presigned_url(self, key, expires_in=3600):
+        return self.public_url(key)
+
+    def open_writer(self, key, content_type='application/octet-stream'):
+        return _FileBlobWriter(self._path(key))
+
+# ---------------------------------------------------------------------------
+# In-memory backend
+# ---------------------------------------------------------------------------
+
+class MemorySettingsRepository:
+    def __init__(self):
+        self.items = {}
+
+    def get(self, setting_key):
+        item = self.items.get(setting_key)
+        return _loads(item) if item else None
+
+    def put(self, item):
+        self.items[item['setting_key']] = _dumps(item)
+
+class MemoryDocumentRepository:
+    def __init__(self):
+        self.items = {}
+
+    def get(self, document_id):
+        item = self.items.get(document_id)
+        return _loads(item) if item else None
+
+    def get_many(self, document_ids):
+        return {d: _loads(self.items[d]) for d in dict.fromkeys(document_ids) if d in self.items}
+
+    def put(self, item):
+        self.items[item['document_id']] = _dumps(item)
+
+    def put_if_absent(self, item):
+        # dict.setdefault is atomic under the GIL
+        serialized = _dumps(item)
+        return self.items.setdefault(item['document_id'], serialized) is serialized
+
+    def scan(self):
+        return [_loads(item) for item in list(self.items.values())]
+
+    def scan_segment(self, segment, total_segments):
+        yield [_loads(item) for item in list(self.items.values())[segment::total_segments]], 0
+
+class MemorySearchIndexRepository:
+    def __init__(self):
+        self.terms = {}
+
+    def put_entries(self, entries):
+        for entry in entries:
+            self.terms.setdefault(entry['term'], {})[entry['sort_key']] = _dumps(entry)
+
+    def query(self, term, start, end, before=None, limit=50):
+        entries = self.terms.get(term, {})
+        keys = sorted((k for k in list(entries) if start <= k <= end and (not before or k < before)),
+                      reverse=True)
+        return [_loads(entries[k]) for k in keys[:limit]]
+
+class MemoryAggregatesRepository:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def increment(self, buckets, deltas):
+        with self.lock:
+            for bucket in buckets:
+                counters = self.buckets.setdefault(bucket, {})
+                for counter, delta in deltas.items():
+                    counters[counter] = counters.get(counter, 0) + delta
+
+    def get(self, buckets):
+        with self.lock:
+            return {b: dict(self.buckets[b]) for b in buckets if b in self.buckets}
+
+class _MemoryBlobWriter(io.BytesIO):
+    def __init__(self, blobs, key):
+        super().__init__()
+        self.blobs = blobs
+        self.key = key
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.blobs[self.key] = self.getvalue()
+        self.close()
+        return False
+
+class MemoryBlobStore:
+    def __init__(self):
+        self.blobs = {}
+
+    def put(self, key, body, content_type='application/octet-stream', cache_control=None):
+        self.blobs[key] = bytes(body)
+
+    def get(self, key):
+        return self.blobs.get(key)
+
+    def exists(self, key):
+        return key in self.blobs
+
+    def uri(self, key):
+        return f'memory://{key}'
+
+    def public_url(self, key):
+        return self.uri(key)
+
+    def presigned_url(self, key, expires_in=3600):
+        return self.public_url(key)
+
+    def open_writer(self, key, content_type='application/octet-stream'):
+        return _MemoryBlobWriter(self.blobs, key)
+
+# ---------------------------------------------------------------------------
+# Backend selection
+# ---------------------------------------------------------------------------
+
+class Storage:
+    """Bundle of the repositories of one backend"""
+
+    def __init__(self, backend, settings, documents, blobs, index, aggregates):
+        self.backend = backend
+        self.settings = settings
+        self.documents = documents
+        self.blobs = blobs
+        self.index = index
+        self.aggregates = aggregates
+
+def create_storage(backend=STORAGE_BACKEND):
+    """Build the repositories for a backend name"""
+    storage = _create_backend(backend)
+    # Line items compressed, oversized documents moved to the blob store
+    from document_codec import EncodedDocumentRepository
+    storage.documents = EncodedDocumentRepository(storage.documents, storage.blobs)
+    return storage
+
+def _create_backend(backend):
+    if backend == 'dynamodb':
+        import boto3
+
+        from metrics import instrument_client
+
+        config = aws_client_config()
+        dynamodb = boto3.resource('dynamodb', config=config)
+        s3_client = boto3.client('s3', config=config)
+        # Per-operation call timings
+        instrument_client(dynamodb.meta.client)
+        instrument_client(s3_client)
+        return Storage(
+            backend,
+            settings=DynamoDBSettingsRepository(dynamodb.Table(SETTINGS_TABLE)),
+            documents=DynamoDBDocumentRepository(dynamodb.Table(DOCUMENTS_TABLE)),
+            blobs=S3BlobStore(s3_client, S3_BUCKET),
+            index=DynamoDBSearchIndexRepository(dynamodb.Table(INDEX_TABLE)),
+            aggregates=DynamoDBAggregatesRepository(dynamodb.Table(AGGREGATES_TABLE)),
+        )
+    if backend == 'sqlite':
+        db = SQLiteDatabase(SQLITE_PATH)
+        return Storage(
+            backend,
+            settings=SQLiteSettingsRepository(db),
+            documents=SQLiteDocumentRepository(db),
+            blobs=FileBlobStore(BLOB_DIR),
+            index=SQLiteSearchIndexRepository(db),
+            aggregates=SQLiteAggregatesRepository(db),
+        )
+    if backend == 'memory':
+        return Storage(
+            backend,
+            settings=MemorySettingsRepository(),
+            documents=MemoryDocumentRepository(),
+            blobs=MemoryBlobStore(),
+            index=MemorySearchIndexRepository(),
+            aggregates=MemoryAggregatesRepository(),
+        )
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def get_storage():
+    """Process-wide storage instance for the configured backend"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = create_storage()
+        return _storage
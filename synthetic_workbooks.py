@@ -0,0 +1,90 @@
+"""
+Synthetic order workbooks for M&J Toys Inc. benchmarks and load tests.
+Builds .xlsx files shaped like Invoice_generator_old_sample/template.xlsx,
+with the same mix of cell types: integer and decimal numbers, dates, text
+with non-breaking spaces, blank optional cells and the odd 'N/A'.
+"""
+
+import io
+import random
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+COLUMNS = [
+    'Order_number', 'Invoice_Date', 'Item_no', 'Description', 'Recipient_Company', 'Recipient_Name',
+    'Address1', 'Address2', 'City', 'Country_Code', 'Postal_Code', 'State', 'Phone', 'Fax',
+    'Customer_ID', 'SO_No', 'SO_Date', 'Order_Unit', 'unit', 'Pack', 'line_number', 'Net_Price',
+    'Total_WT', 'Vol', 'Date_Paid', 'Ship_Date', 'PO_No', 'Shipping_Handling', 'Sales_rep',
+    'ship_via', 'Terms', 'Discount',
+]
+
+_PRODUCTS = ['Medium Plush', 'Large Plush', 'Little Plush', 'Clip-On', 'Squishmallow Stackable', 'Keychain']
+_SERIES = ['Pokemon Series', "Valentine's Day 2024", 'Halloween Squad', 'Sports Squad', 'Easter 2024']
+_COMPANIES = ['RTGC INC.', 'FUN TOYS LLC', 'TOY WORLD CORP', 'PLUSH PALACE', 'KIDS KORNER']
+_CITIES = [('TUSTIN', 'CA', 92780), ('RENO', 'NV', 89501), ('AUSTIN', 'TX', 73301), ('MIAMI', 'FL', 33101)]
+_TERMS = ['Wire Transfer', 'Net 30', 'Credit Card', 'COD']
+_SHIP_VIA = ['Local Pick Up', 'UPS Ground', 'FedEx', 'Freight']
+
+def synthetic_rows(orders=100, lines_per_order=8, seed=0, start_order=10000):
+    """Header row and data rows of a synthetic workbook"""
+    rng = random.Random(seed)
+    rows = [COLUMNS]
+    for n in range(orders):
+        order_number = start_order + n
+        invoice_date = datetime(2024, 1, 1) + timedelta(days=rng.randrange(365))
+        company = rng.choice(_COMPANIES)
+        city, state, postal = rng.choice(_CITIES)
+        phone = f'({rng.randrange(200, 999)}) {rng.randrange(200, 999)}-{rng.randrange(1000, 9999)}'
+        header = {
+            'Order_number': order_number,
+            'Invoice_Date': invoice_date,
+            'Recipient_Company': company,
+            'Recipient_Name': f'Attn: BUYER {n % 50}',
+            'Address1': f'{rng.randrange(100, 99999)}\xa0MAIN\xa0ST',
+            'Address2': rng.choice([None, 'STE\xa0120', 'UNIT 4']),
+            'City': city,
+            'Country_Code': 'US',
+            'Postal_Code': postal,
+            'State': state,
+            'Phone': phone,
+            'Fax': rng.choice([phone, 'N/A', None]),
+            'Customer_ID': f'{state}{order_number % 10000:04d}',
+            'SO_No': order_number + 86,
+            'SO_Date': invoice_date - timedelta(days=3),
+            'Date_Paid': rng.choice([invoice_date, None]),
+            'Ship_Date': invoice_date + timedelta(days=rng.randrange(5)),
+            'PO_No': f'PO{order_number}',
+            'Shipping_Handling': rng.choice([0, 0, 25, 12.5]),
+            'Sales_rep': rng.choice(['Brenda', 'Carlos', 'Dana']),
+            'ship_via': rng.choice(_SHIP_VIA),
+            'Terms': rng.choice(_TERMS),
+            'Discount': rng.choice([0, 0, 5, 2.5]),
+        }
+        for line in range(1, rng.randint(1, 2 * lines_per_order) + 1):
+            pack = rng.choice([6, 12, 24, 36])
+            order_unit = rng.randint(1, 20)
+            row = dict(header)
+            row.update({
+                'Item_no': f'SQ{rng.choice("PKVAHE")}{rng.choice("KAE")}{rng.randrange(100000):05d}',
+                'Description': f'SQK - {rng.choice(_PRODUCTS)} ({rng.choice(_SERIES)} Asst.)',
+                'Order_Unit': order_unit,
+                'unit': 'CS',
+                'Pack': pack,
+                'line_number': line,
+                'Net_Price': round(rng.uniform(1, 40) * 2) / 2,
+                'Total_WT': round(order_unit * rng.uniform(0.5, 20), 2),
+                'Vol': round(order_unit * rng.uniform(0.1, 5), 2),
+            })
+            rows.append([row.get(column) for column in COLUMNS])
+    return rows
+
+def synthetic_workbook(orders=100, lines_per_order=8, seed=0, start_order=10000):
+    """Bytes of a synthetic .xlsx workbook"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Orders')
+    for row in synthetic_rows(orders, lines_per_order, seed, start_order):
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
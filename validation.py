@@ -0,0 +1,151 @@
+"""
+Row Validation for M&J Toys Inc.
+Checks a whole order workbook in one vectorized pass: required columns and
+values, numeric ranges, unparseable dates and header fields that disagree
+within an order. Orders with any error are left out of the parse and listed
+in a compact report with their sheet row numbers.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Columns the parser cannot work without
+REQUIRED_COLUMNS = ['Order_number', 'Item_no', 'Order_Unit', 'Pack', 'Net_Price']
+
+# Optional columns filled in when the sheet doesn't have them
+COLUMN_DEFAULTS = {
+    'Discount': '0',
+    'Shipping_Handling': '0',
+    'Total_WT': '0',
+    'Vol': '0',
+}
+
+# column -> (minimum, maximum, whole numbers only, value required)
+NUMERIC_RULES = {
+    'Order_Unit': (0, None, True, True),
+    'Pack': (0, None, True, True),
+    'Net_Price': (0, None, False, True),
+    'Total_WT': (0, None, False, False),
+    'Vol': (0, None, False, False),
+    'Discount': (0, 100, False, False),
+    'Shipping_Handling': (0, None, False, False),
+}
+
+DATE_COLUMNS = ['Invoice_Date', 'SO_Date', 'Date_Paid', 'Ship_Date']
+
+# Order-level fields that must be the same on every row of an order
+HEADER_FIELDS = ['Invoice_Date', 'Customer_ID', 'SO_No', 'PO_No', 'Recipient_Company',
+                 'Terms', 'Discount', 'Shipping_Handling']
+
+# Individual errors listed in the report; the rest are only counted
+MAX_REPORTED_ERRORS = 200
+
+class WorkbookError(ValueError):
+    """The workbook as a whole can't be parsed (e.g. required columns missing)"""
+
+def _per_unique(col, fn):
+    """
+    Apply a Series function to the distinct values of col only and broadcast
+    the result back; workbook columns repeat heavily, so this is much cheaper.
+    """
+    codes, uniques = pd.factorize(col)
+    distinct = pd.Series(np.append(uniques.astype(object), np.nan), dtype=object)
+    codes[codes < 0] = len(uniques)
+    return pd.Series(fn(distinct).to_numpy()[codes], index=col.index)
+
+def _blank(col):
+    return _per_unique(col, lambda values: values.isna() | values.astype(str).str.strip().eq('')).astype(bool)
+
+def _format_dates(values):
+    return pd.to_datetime(values, errors='coerce').dt.strftime('%m/%d/%Y')
+
+def validate_frame(df):
+    """
+    Validate and normalize a workbook read with dtype=str. Numeric columns are
+    converted (blanks in optional columns become 0) and dates formatted as
+    MM/DD/YYYY. Returns (valid_df, report).
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise WorkbookError(f"Missing required columns: {', '.join(missing)}")
+
+    df = df.copy()
+    for col, default in COLUMN_DEFAULTS.items():
+        if col not in df.columns:
+            df[col] = default
+
+    # (mask, column, message) for each failed check
+    checks = []
+    for col in REQUIRED_COLUMNS:
+        if col not in NUMERIC_RULES:
+            checks.append((_blank(df[col]), col, 'missing value'))
+
+    for col, (minimum, maximum, whole, required) in NUMERIC_RULES.items():
+        raw = df[col]
+        blank = _blank(raw)
+        values = _per_unique(raw, lambda distinct: pd.to_numeric(distinct, errors='coerce')).astype(float)
+        checks.append((~blank & values.isna(), col, 'not a number'))
+        if required:
+            checks.append((blank, col, 'missing value'))
+        if minimum is not None:
+            checks.append((values < minimum, col, f'must be at least {minimum}'))
+        if maximum is not None:
+            checks.append((values > maximum, col, f'must be at most {maximum}'))
+        if whole:
+            checks.append((values.notna() & (values % 1 != 0), col, 'must be a whole number'))
+        df[col] = values.fillna(0)
+
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            raw = df[col]
+            formatted = _per_unique(raw, _format_dates)
+            checks.append((~_blank(raw) & formatted.isna(), col, 'not a valid date'))
+            df[col] = formatted
+
+    # Header fields compared against the first row of each order
+    header_fields = [col for col in HEADER_FIELDS if col in df.columns]
+    if header_fields:
+        headers = df[header_fields].astype(str).where(df[header_fields].notna(), '')
+        first = headers.groupby(df['Order_number'].fillna(''), sort=False).transform('first')
+        for col in header_fields:
+            checks.append((headers[col] != first[col], col, 'differs from the first row of the order'))
+
+    failed = pd.Series(False, index=df.index)
+    for mask, _, _ in checks:
+        failed |= mask.fillna(False)
+
+    bad_orders = set(df.loc[failed, 'Order_number'].dropna().astype(str))
+    excluded = failed | df['Order_number'].astype(str).isin(bad_orders)
+    report = build_report(df, checks, bad_orders, excluded)
+    return df[~excluded], report
+
+def build_report(df, checks, bad_orders, excluded):
+    """Compact error report: counts plus the first MAX_REPORTED_ERRORS errors by sheet row"""
+    errors = []
+    total = 0
+    for mask, col, message in checks:
+        mask = mask.fillna(False)
+        count = int(mask.sum())
+        if not count:
+            continue
+        total += count
+        if len(errors) < MAX_REPORTED_ERRORS:
+            order_numbers = df.loc[mask, 'Order_number'].head(MAX_REPORTED_ERRORS - len(errors))
+            for index, order_number in order_numbers.items():
+                errors.append({
+                    # Header is sheet row 1
+                    'row': int(index) + 2,
+                    'order_number': '' if pd.isna(order_number) else str(order_number),
+                    'column': col,
+                    'error': message,
+                })
+    errors.sort(key=lambda error: error['row'])
+    return {
+        'valid': total == 0,
+        'rows_checked': int(len(df)),
+        'rows_excluded': int(excluded.sum()),
+        'error_count': total,
+        'invalid_orders': sorted(bad_orders),
+        'errors': errors,
+        'truncated': total > len(errors),
+    }